@@ -74,6 +74,11 @@ class ConflictDetector:
                 # Charger les ranges pour ce groupe
                 contexts_with_ranges = self._load_ranges_for_contexts(conn, group_contexts)
 
+                # Pré-filtre : des contextes aux ranges identiques donnent les mêmes
+                # réponses à toutes les séquences, inutile de comparer main par main
+                if len({self._decision_fingerprint(ctx) for ctx in contexts_with_ranges}) < 2:
+                    continue
+
                 # Détecter les conflits
                 group_conflicts = self._detect_conflicts_in_group(contexts_with_ranges)
 
@@ -142,6 +147,14 @@ class ConflictDetector:
 
         return contexts
 
+    @staticmethod
+    def _decision_fingerprint(context: Dict) -> Tuple:
+        """
+        Empreinte de tout ce dont dépendent les réponses d'un contexte :
+        labels et mains de ses ranges, dans l'ordre (priorité au niveau 0).
+        """
+        return tuple((r['label_canon'], frozenset(r['hands'])) for r in context['ranges'])
+
     def _group_by_displayed_metadata(self, contexts: List[Dict]) -> Dict[str, List[Dict]]:
         """
         Groupe les contextes par métadonnées visibles identiques.
@@ -4,12 +4,15 @@ Gère la correction manuelle des contextes ambigus ou incomplets.
 Version avec support action_sequence pour squeeze et vs_limpers + validation cohérence positions
 """
 
+import logging
 import sqlite3
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import re
 import json
 
+logger = logging.getLogger(__name__)
+
 # --- Helpers module-level : sûrs et indépendants de la classe ---
 
 SR_CANON = {
@@ -367,6 +370,27 @@ def validate_limpers_positions(
     return errors
 
 
+# Mapping label_canon → nom lisible
+LABEL_TO_NAME = {
+    "OPEN": "open",
+    "DEFENSE": "defense",
+    "SQUEEZE": "squeeze",
+    "VS_LIMPERS": "vs_limpers",
+    "CALL": "call",
+    "R3_VALUE": "3bet_value",
+    "R3_BLUFF": "3bet_bluff",
+    "R4_VALUE": "4bet_value",
+    "R4_BLUFF": "4bet_bluff",
+    "R5_ALLIN": "5bet_allin",
+    "ISO_RAISE": "iso_raise",
+    "ISO_VALUE": "iso_value",
+    "ISO_BLUFF": "iso_bluff",
+    "CHECK": "check",
+    "RAISE": "raise",
+    "UNKNOWN": "unknown"
+}
+
+
 class ContextValidator:
     """Gère la validation et correction des métadonnées de contextes ET sous-ranges."""
 
@@ -580,79 +604,21 @@ class ContextValidator:
         Returns:
             Tuple (succès, message)
         """
-        # Mapping label_canon → nom lisible
-        LABEL_TO_NAME = {
-            "OPEN": "open",
-            "DEFENSE": "defense",
-            "SQUEEZE": "squeeze",
-            "VS_LIMPERS": "vs_limpers",
-            "CALL": "call",
-            "R3_VALUE": "3bet_value",
-            "R3_BLUFF": "3bet_bluff",
-            "R4_VALUE": "4bet_value",
-            "R4_BLUFF": "4bet_bluff",
-            "R5_ALLIN": "5bet_allin",
-            "ISO_RAISE": "iso_raise",
-            "ISO_VALUE": "iso_value",
-            "ISO_BLUFF": "iso_bluff",
-            "CHECK": "check",
-            "RAISE": "raise",
-            "UNKNOWN": "unknown"
-        }
 
         conn = self.get_connection()
         cursor = conn.cursor()
 
         try:
-            # Vérifier que la colonne label_canon existe
-            cursor.execute("PRAGMA table_info(ranges)")
-            columns = [col[1] for col in cursor.fetchall()]
-
-            if "label_canon" not in columns:
-                # Créer la colonne si elle n'existe pas
-                cursor.execute("""
-                    ALTER TABLE ranges 
-                    ADD COLUMN label_canon TEXT
-                """)
-
-            # Mettre à jour chaque range (label ET nom)
-            for range_id, label_canon in range_labels.items():
-                # 🆕 Récupérer le range_key pour savoir si c'est la range principale
-                cursor.execute("""
-                    SELECT range_key 
-                    FROM ranges 
-                    WHERE id = ?
-                """, (range_id,))
-
-                result = cursor.fetchone()
-                if not result:
-                    return False, f"Range ID {range_id} introuvable"
-
-                range_key = result[0]
-
-                # 🆕 Validation selon le type de range
-                if range_key == '1':
-                    # Range principale : valider contre VALID_MAIN_RANGE_LABELS
-                    if label_canon not in VALID_MAIN_RANGE_LABELS:
-                        return False, f"Label principal invalide: {label_canon}"
-                else:
-                    # Sous-range : valider contre SR_LABELS
-                    if label_canon not in SR_LABELS:
-                        return False, f"Label sous-range invalide: {label_canon}"
-
-                # Générer le nouveau nom
-                new_name = LABEL_TO_NAME.get(label_canon, label_canon.lower())
+            # Verrou d'écriture pris d'emblée : lectures et mises à jour dans une
+            # seule transaction (un seul commit, pas d'échec en cours de route)
+            cursor.execute("BEGIN IMMEDIATE")
 
-                cursor.execute("""
-                    UPDATE ranges 
-                    SET label_canon = ?,
-                        name = ?,
-                        action = ?
-                    WHERE id = ?
-                """, (label_canon, new_name, new_name, range_id))
-
-            conn.commit()
-            return True, f"{len(range_labels)} sous-ranges mis à jour"
+            success, message = self._apply_subrange_labels(cursor, range_labels)
+            if success:
+                conn.commit()
+            else:
+                conn.rollback()
+            return success, message
 
         except Exception as e:
             conn.rollback()
@@ -660,6 +626,74 @@ class ContextValidator:
         finally:
             conn.close()
 
+    def _apply_subrange_labels(
+            self,
+            cursor: sqlite3.Cursor,
+            range_labels: Dict[int, str]
+    ) -> Tuple[bool, str]:
+        """
+        Valide puis écrit les labels des sous-ranges dans la transaction en cours
+        du curseur fourni (ni BEGIN ni commit : à la charge de l'appelant).
+
+        Args:
+            cursor: Curseur de la connexion qui porte la transaction
+            range_labels: Dictionnaire {range_id: label_canon}
+
+        Returns:
+            Tuple (succès, message) ; rien n'est écrit en cas d'échec
+        """
+        # Vérifier que la colonne label_canon existe
+        cursor.execute("PRAGMA table_info(ranges)")
+        columns = [col[1] for col in cursor.fetchall()]
+
+        if "label_canon" not in columns:
+            # Créer la colonne si elle n'existe pas
+            cursor.execute("""
+                ALTER TABLE ranges 
+                ADD COLUMN label_canon TEXT
+            """)
+
+        # Récupérer tous les range_key en une requête (range principale ou sous-range)
+        range_ids = list(range_labels)
+        placeholders = ','.join('?' * len(range_ids))
+        cursor.execute(f"""
+            SELECT id, range_key 
+            FROM ranges 
+            WHERE id IN ({placeholders})
+        """, range_ids)
+        range_keys = dict(cursor.fetchall())
+
+        # Valider tous les labels avant d'écrire quoi que ce soit
+        updates = []
+        for range_id, label_canon in range_labels.items():
+            if range_id not in range_keys:
+                return False, f"Range ID {range_id} introuvable"
+
+            # 🆕 Validation selon le type de range
+            if range_keys[range_id] == '1':
+                # Range principale : valider contre VALID_MAIN_RANGE_LABELS
+                if label_canon not in VALID_MAIN_RANGE_LABELS:
+                    return False, f"Label principal invalide: {label_canon}"
+            else:
+                # Sous-range : valider contre SR_LABELS
+                if label_canon not in SR_LABELS:
+                    return False, f"Label sous-range invalide: {label_canon}"
+
+            # Générer le nouveau nom
+            new_name = LABEL_TO_NAME.get(label_canon, label_canon.lower())
+            updates.append((label_canon, new_name, new_name, range_id))
+
+        # Mettre à jour toutes les ranges (label ET nom) en un seul executemany
+        cursor.executemany("""
+            UPDATE ranges 
+            SET label_canon = ?,
+                name = ?,
+                action = ?
+            WHERE id = ?
+        """, updates)
+
+        return True, f"{len(range_labels)} sous-ranges mis à jour"
+
     def validate_and_update(
             self,
             context_id: int,
@@ -788,9 +822,12 @@ class ContextValidator:
         cursor = conn.cursor()
 
         try:
+            # Toutes les écritures du contexte et de ses sous-ranges : une seule transaction
+            cursor.execute("BEGIN IMMEDIATE")
+
             # Mettre à jour les sous-ranges d'abord si fournis
             if range_labels:
-                success, msg = self.update_subrange_labels(range_labels)
+                success, msg = self._apply_subrange_labels(cursor, range_labels)
                 if not success:
                     conn.rollback()
                     return False, f"Erreur sous-ranges: {msg}"
@@ -946,8 +983,7 @@ class ContextValidator:
 
         except Exception as e:
             conn.rollback()
-            import traceback
-            traceback.print_exc()
+            logger.exception("Erreur validate_and_update (context_id=%s)", context_id)
             return False, f"Erreur lors de la mise à jour : {str(e)}"
 
         finally:
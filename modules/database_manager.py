@@ -8,6 +8,8 @@ Version 4.1 :
 - Validations optionnelles (ranges génériques permises)
 """
 
+import hashlib
+import logging
 import sqlite3
 import json
 from pathlib import Path
@@ -15,6 +17,31 @@ from typing import Optional, Dict, List, Any, Union
 from dataclasses import asdict
 from quiz_action_mapper import QuizActionMapper
 
+logger = logging.getLogger(__name__)
+
+
+# Hash des fichiers sources déjà lus : {chemin: (st_mtime_ns, st_size, md5)}
+_FILE_HASH_CACHE: Dict[str, tuple] = {}
+
+
+def file_content_hash(path: Path) -> str:
+    """
+    MD5 du contenu texte d'un fichier (même calcul que JSONRangeParser).
+
+    Le fichier n'est relu que si sa date de modification ou sa taille a changé :
+    un import sans nouveau fichier ne relit plus tout le répertoire.
+    """
+    stat = path.stat()
+    key = str(path)
+    cached = _FILE_HASH_CACHE.get(key)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    content = path.read_text(encoding='utf-8')
+    file_hash = hashlib.md5(content.encode()).hexdigest()
+    _FILE_HASH_CACHE[key] = (stat.st_mtime_ns, stat.st_size, file_hash)
+    return file_hash
+
 
 def map_name_to_label_canon(name: str, range_key: str, primary_action: str = None) -> str:
     """
@@ -279,6 +306,12 @@ class DatabaseManager:
                     CREATE INDEX IF NOT EXISTS idx_ranges_label_canon ON ranges(label_canon);
                     CREATE INDEX IF NOT EXISTS idx_ranges_context_label ON ranges(context_id, label_canon);
                     CREATE INDEX IF NOT EXISTS idx_ranges_action_sequence ON ranges(action_sequence);
+                    CREATE INDEX IF NOT EXISTS idx_ranges_context_key_int ON ranges(context_id, CAST(range_key AS INTEGER));
+                    CREATE INDEX IF NOT EXISTS idx_ctx_dashboard ON range_contexts(needs_validation DESC, quiz_ready DESC, id DESC);
+                    CREATE INDEX IF NOT EXISTS idx_ctx_needs_conf ON range_contexts(needs_validation, confidence_score);
+                    CREATE INDEX IF NOT EXISTS idx_ranges_ctx ON ranges(context_id, range_key);
+                    CREATE INDEX IF NOT EXISTS idx_rh_rid ON range_hands(range_id, hand);
+                    CREATE INDEX IF NOT EXISTS idx_ctx_errors ON range_contexts(id) WHERE error_message IS NOT NULL;
                 """)
 
                 # Vérifier et appliquer migrations si nécessaire
@@ -998,14 +1031,13 @@ class DatabaseManager:
                 else:
                     status_msg = "⚠️ Nécessite validation (métadonnées à compléter)"
 
-                print(f"[DB] Contexte '{enriched_metadata.display_name}' sauvegardé (ID: {context_id}) - {status_msg}")
+                logger.info("[DB] Contexte '%s' sauvegardé (ID: %s) - %s",
+                            enriched_metadata.display_name, context_id, status_msg)
 
                 return True
 
-        except Exception as e:
-            print(f"[DB] Erreur sauvegarde contexte '{parsed_context.context_name}': {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("[DB] Erreur sauvegarde contexte '%s'", parsed_context.context_name)
             return False
 
     def mark_context_error(self, filename: str, error_message: str) -> bool:
@@ -1065,16 +1097,17 @@ class DatabaseManager:
 
     def get_files_to_process(self, ranges_dir: Path) -> List[Path]:
         """Récupère la liste des fichiers JSON à traiter (nouveaux ou modifiés)"""
-        import hashlib
-
         files_to_process = []
 
+        # Couples (nom, hash) déjà importés, chargés en une seule requête
+        with sqlite3.connect(self.db_path) as conn:
+            imported = set(conn.execute("SELECT filename, file_hash FROM range_files"))
+
         for json_file in ranges_dir.glob("*.json"):
             try:
-                content = json_file.read_text(encoding='utf-8')
-                file_hash = hashlib.md5(content.encode()).hexdigest()
+                file_hash = file_content_hash(json_file)
 
-                if not self.check_file_exists(json_file.name, file_hash):
+                if (json_file.name, file_hash) not in imported:
                     files_to_process.append(json_file)
                 else:
                     print(f"[DB] Fichier '{json_file.name}' déjà importé (hash identique)")
@@ -4,11 +4,14 @@ Exemple d'utilisation de action_sequence dans le drill down
 Montre comment parser et utiliser les séquences d'actions
 """
 
+import logging
 import sqlite3
 import random
 from typing import List, Dict, Optional, Set
 from poker_constants import RANGE_STRUCTURE
 
+logger = logging.getLogger(__name__)
+
 
 class DrillDownGenerator:
     """Gestionnaire de drill down utilisant action_sequence"""
@@ -117,7 +120,7 @@ class DrillDownGenerator:
             results = cursor.fetchall()
 
             if not results:
-                print(f"❌ Aucune séquence trouvée pour {hand} dans le contexte {context_id}")
+                logger.debug("❌ Aucune séquence trouvée pour %s dans le contexte %s", hand, context_id)
                 return []
 
             # Prendre la première séquence (ou fusionner si plusieurs)
@@ -125,7 +128,7 @@ class DrillDownGenerator:
             range_name = results[0][1]
             label_canon = results[0][2]
 
-            print(f"✅ Séquence trouvée pour {hand} ({range_name}, {label_canon}): {sequence_str}")
+            logger.debug("✅ Séquence trouvée pour %s (%s, %s): %s", hand, range_name, label_canon, sequence_str)
 
             # Parser la séquence
             steps = sequence_str.split("→")
@@ -245,11 +248,11 @@ class DrillDownGenerator:
         has_subranges = any(r.get('range_key') != '1' for r in ranges)
 
         if not has_subranges:
-            print("[DRILL] Pas de sous-ranges → pas de drill down")
+            logger.debug("[DRILL] Pas de sous-ranges → pas de drill down")
             return False
 
-        print(
-            f"[DRILL] {sum(1 for r in ranges if r.get('range_key') != '1')} sous-ranges détectées → drill down possible")
+        logger.debug("[DRILL] %s sous-ranges détectées → drill down possible",
+                     sum(1 for r in ranges if r.get('range_key') != '1'))
         return True
 
     def generate_drill_down_question(
@@ -258,7 +261,8 @@ class DrillDownGenerator:
             ranges: List[Dict],
             in_range_hands: Set[str],
             out_of_range_hands: Set[str],
-            used_hands: set = None
+            used_hands: set = None,
+            max_steps: Optional[int] = None
     ) -> Optional[Dict]:
         """
         Génère une question de drill down pour le système de quiz
@@ -270,6 +274,7 @@ class DrillDownGenerator:
             in_range_hands: Set des mains dans la range principale
             out_of_range_hands: Set des mains hors range
             used_hands: Set des mains abstraites déjà utilisées
+            max_steps: Nombre maximal d'étapes (places restantes dans le quiz), None = illimité
 
         Returns:
             Dict avec la question drill down complète, ou None si impossible
@@ -285,12 +290,12 @@ class DrillDownGenerator:
         # 🔧 BUGFIX v4.3.6 : Générer la position du Vilain UNE SEULE FOIS pour tout le drill-down
         villain_position = self._generate_fixed_villain_position(context)
         context['villain_position_fixed'] = villain_position  # Stocker pour réutilisation
-        print(f"[DRILL] 🎯 Position du Vilain fixée pour toute la séquence: {villain_position}")
+        logger.debug("[DRILL] 🎯 Position du Vilain fixée pour toute la séquence: %s", villain_position)
 
         # 1. Vérifier qu'il y a des sous-ranges
         subranges = [r for r in ranges if r.get('range_key') != '1']
         if not subranges:
-            print(f"[DRILL] Pas de sous-ranges pour contexte {context_id} → pas de drill down")
+            logger.debug("[DRILL] Pas de sous-ranges pour contexte %s → pas de drill down", context_id)
             return None
 
         # 🆕 v4.3.7 : Filtrer les mains déjà utilisées
@@ -299,14 +304,14 @@ class DrillDownGenerator:
 
         # Si on a fait le tour, réinitialiser
         if not available_in_range and not available_out_range:
-            print(f"[DRILL] ♻️  Toutes les mains utilisées, réinitialisation")
+            logger.debug("[DRILL] ♻️  Toutes les mains utilisées, réinitialisation")
             available_in_range = in_range_hands
             available_out_range = out_of_range_hands
         elif not available_in_range:
-            print(f"[DRILL] ⚠️  Plus de mains in-range disponibles")
+            logger.debug("[DRILL] ⚠️  Plus de mains in-range disponibles")
             available_in_range = set()  # Vide, forcera out-range
         elif not available_out_range:
-            print(f"[DRILL] ⚠️  Plus de mains out-range disponibles")
+            logger.debug("[DRILL] ⚠️  Plus de mains out-range disponibles")
             available_out_range = set()  # Vide, forcera in-range
 
         # 2. Choisir une main dans la range principale
@@ -315,10 +320,10 @@ class DrillDownGenerator:
 
         if is_in_range and available_in_range:
             hand = smart_hand_choice(available_in_range, available_out_range, is_in_range=True)
-            print(f"[DRILL] Main choisie IN-RANGE: {hand}")
+            logger.debug("[DRILL] Main choisie IN-RANGE: %s", hand)
         else:
             hand = smart_hand_choice(available_out_range, available_in_range, is_in_range=False)
-            print(f"[DRILL] Main choisie OUT-RANGE: {hand}")
+            logger.debug("[DRILL] Main choisie OUT-RANGE: %s", hand)
             is_in_range = False
 
         # 3. Chercher dans quelle sous-range est la main
@@ -326,25 +331,25 @@ class DrillDownGenerator:
         for subrange in subranges:
             if hand in subrange.get('hands', []):
                 subrange_with_hand = subrange
-                print(
-                    f"[DRILL] ✅ Main {hand} trouvée dans sous-range: {subrange.get('name')} ({subrange.get('label_canon')})")
+                logger.debug("[DRILL] ✅ Main %s trouvée dans sous-range: %s (%s)",
+                             hand, subrange.get('name'), subrange.get('label_canon'))
                 break
 
         if not subrange_with_hand:
-            print(f"[DRILL] ⚠️ Main {hand} n'est dans AUCUNE sous-range → FOLD implicite")
+            logger.debug("[DRILL] ⚠️ Main %s n'est dans AUCUNE sous-range → FOLD implicite", hand)
 
         # 4. Générer ou récupérer la séquence
         if subrange_with_hand and subrange_with_hand.get('action_sequence'):
             # La main est dans une sous-range avec séquence
             sequence_str = subrange_with_hand['action_sequence']
-            print(f"[DRILL] Séquence trouvée dans {subrange_with_hand['name']}: {sequence_str}")
+            logger.debug("[DRILL] Séquence trouvée dans %s: %s", subrange_with_hand['name'], sequence_str)
         else:
             # Main pas dans les sous-ranges → FOLD implicite
             sequence_str = self._generate_implicit_fold_sequence(primary_action)
-            print(f"[DRILL] FOLD implicite généré: {sequence_str}")
+            logger.debug("[DRILL] FOLD implicite généré: %s", sequence_str)
 
             if not sequence_str:
-                print(f"[DRILL] ❌ Impossible de générer une séquence pour {hand}")
+                logger.debug("[DRILL] ❌ Impossible de générer une séquence pour %s", hand)
                 return None
 
         # 5. Parser la séquence
@@ -364,7 +369,7 @@ class DrillDownGenerator:
         if is_implicit_fold:
             # FOLD implicite : toujours montrer les 2 étapes (RAISE→FOLD)
             num_steps_to_use = min(2, total_steps)
-            print(f"[DRILL] FOLD implicite détecté → forcer 2 étapes minimum")
+            logger.debug("[DRILL] FOLD implicite détecté → forcer 2 étapes minimum")
         else:
             # Séquence normale : tirage probabiliste selon l'agressivité
             continue_prob = self.aggression['drill_depth_continue_prob']
@@ -375,8 +380,17 @@ class DrillDownGenerator:
                 else:
                     break  # On s'arrête là
 
-        print(
-            f"[DRILL] Séquence complète: {total_steps} étapes → on en fait: {num_steps_to_use} (prob_continue={self.aggression['drill_depth_continue_prob'] * 100:.0f}%)")
+        # 📏 Budget du quiz : la question doit tenir dans les places restantes
+        if max_steps is not None and num_steps_to_use > max_steps:
+            if is_implicit_fold:
+                # FOLD implicite tronqué à 1 étape : pas pédagogique → question simple
+                logger.debug("[DRILL] FOLD implicite sur %s étapes > budget %s → abandon",
+                             num_steps_to_use, max_steps)
+                return None
+            num_steps_to_use = max_steps
+
+        logger.debug("[DRILL] Séquence complète: %s étapes → on en fait: %s (prob_continue=%.0f%%)",
+                     total_steps, num_steps_to_use, self.aggression['drill_depth_continue_prob'] * 100)
 
         # Tronquer la séquence
         sequence = full_sequence[:num_steps_to_use]
@@ -411,7 +425,7 @@ class DrillDownGenerator:
             is_allin = False
             if villain_reaction and villain_reaction.get('action') == 'ALL_IN':
                 is_allin = True
-                print(f"[DRILL] ⚠️ ALL-IN détecté au niveau {level_num} → arrêt de la séquence")
+                logger.debug("[DRILL] ⚠️ ALL-IN détecté au niveau %s → arrêt de la séquence", level_num)
 
             # Texte de la question
             if level_num == 1:
@@ -430,7 +444,7 @@ class DrillDownGenerator:
                 # Si Vilain est ALL-IN et notre action prévue est RAISE, on doit CALL
                 if is_allin and correct_action == "RAISE":
                     correct_action = "CALL"
-                    print(f"  🔄 ALL-IN détecté: RAISE converti en CALL")
+                    logger.debug("  🔄 ALL-IN détecté: RAISE converti en CALL")
 
                 # Options de base
                 base_options = [correct_action, "CALL", "FOLD"]
@@ -466,7 +480,7 @@ class DrillDownGenerator:
                     # Si CALL est dans les actions originales, c'est la bonne réponse
                     if "CALL" in original_actions:
                         correct_answer = "CALL"
-                        print(f"  🔄 ALL-IN détecté: RAISE/CALL → CALL accepté")
+                        logger.debug("  🔄 ALL-IN détecté: RAISE/CALL → CALL accepté")
 
                 step_options = list(set(step_options))
 
@@ -488,7 +502,7 @@ class DrillDownGenerator:
             if is_allin:
                 # Ajuster le nombre total d'étapes
                 num_steps_to_use = level_num
-                print(f"[DRILL] 📝 Séquence arrêtée après niveau {num_steps_to_use} (all-in)")
+                logger.debug("[DRILL] 📝 Séquence arrêtée après niveau %s (all-in)", num_steps_to_use)
                 break
 
         # 10. Construire la question complète
@@ -519,7 +533,8 @@ class DrillDownGenerator:
             "question": question_text
         }
 
-        print(f"[DRILL] 📝 Question générée: {num_steps_to_use} étapes, première action={correct_action}")
+        logger.debug("[DRILL] 📝 Question générée: %s étapes, première action=%s",
+                     num_steps_to_use, correct_action)
 
         return question
 
@@ -697,7 +712,7 @@ class DrillDownGenerator:
 
             # ⚠️ VÉRIFICATION : Si prob > 0, on peut avoir un all-in direct
             if skip_allin_prob > 0 and random.random() < skip_allin_prob:
-                print(f"  🔥 Vilain reaction niveau 1: ALL-IN DIRECT (skip 3bet)")
+                logger.debug("  🔥 Vilain reaction niveau 1: ALL-IN DIRECT (skip 3bet)")
                 return {
                     'action': 'ALL_IN',
                     'text': f'{villain_position} all-in',  # Skip le 3bet
@@ -706,7 +721,7 @@ class DrillDownGenerator:
                 }
 
             # Cas standard : 3bet normal
-            print(f"  ✅ Vilain reaction niveau 1: 3BET")
+            logger.debug("  ✅ Vilain reaction niveau 1: 3BET")
             return {
                 'action': 'RAISE',
                 'text': f'{villain_position} 3bet',
@@ -723,7 +738,7 @@ class DrillDownGenerator:
             is_allin = random.random() < allin_prob
 
             if is_allin:
-                print(f"  🎲 Vilain reaction niveau 2: ALL-IN (prob={allin_prob * 100:.0f}%)")
+                logger.debug("  🎲 Vilain reaction niveau 2: ALL-IN (prob=%.0f%%)", allin_prob * 100)
                 return {
                     'action': 'ALL_IN',
                     'text': f'{villain_position} all-in',
@@ -731,7 +746,7 @@ class DrillDownGenerator:
                     'allows_raise': False  # On ne peut plus raise face à all-in
                 }
             else:
-                print(f"  🎲 Vilain reaction niveau 2: 5BET (prob={(1 - allin_prob) * 100:.0f}%)")
+                logger.debug("  🎲 Vilain reaction niveau 2: 5BET (prob=%.0f%%)", (1 - allin_prob) * 100)
                 return {
                     'action': 'RAISE',
                     'text': f'{villain_position} 5bet',
@@ -746,7 +761,7 @@ class DrillDownGenerator:
             allin_prob_level3 = self.aggression.get('villain_allin_prob_level3', 0.0)
 
             if allin_prob_level3 > 0 and random.random() < allin_prob_level3:
-                print(f"  🔥 Vilain reaction niveau 3: ALL-IN (7bet, prob={allin_prob_level3 * 100:.0f}%)")
+                logger.debug("  🔥 Vilain reaction niveau 3: ALL-IN (7bet, prob=%.0f%%)", allin_prob_level3 * 100)
                 return {
                     'action': 'ALL_IN',
                     'text': f'{villain_position} all-in',
@@ -754,7 +769,7 @@ class DrillDownGenerator:
                     'allows_raise': False
                 }
             else:
-                print(f"  ✅ Vilain reaction niveau 3: CALL (prob={(1 - allin_prob_level3) * 100:.0f}%)")
+                logger.debug("  ✅ Vilain reaction niveau 3: CALL (prob=%.0f%%)", (1 - allin_prob_level3) * 100)
                 return {
                     'action': 'CALL',
                     'text': f'{villain_position} call',
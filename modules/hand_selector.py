@@ -4,19 +4,34 @@ Sélection intelligente de mains pour le quiz
 Gère le ratio aléatoire/borderline et la détection des mains limites
 """
 
+import logging
 import random
-from typing import Set, List, Tuple
-from poker_constants import ALL_POKER_HANDS, get_hand_strength
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+from typing import Dict, FrozenSet, Set, List, Optional, Tuple
+from poker_constants import ALL_POKER_HANDS_FS, HAND_ID, HAND_STRENGTH_TABLE
 
 # Configuration du ratio de sélection
 QUIZ_RANDOM_RATIO = 0.70  # 70% aléatoire, 30% borderline
 BORDERLINE_PROXIMITY_THRESHOLD = 12  # Distance max pour être borderline OUT
 
+logger = logging.getLogger(__name__)
+
+# Borderlines précalculées par contexte : {context_id: (borderline_in, borderline_out)}
+_BORDERLINE_CACHE: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+# Mains IN/OUT complètes par contexte, sous forme de tuples indexables
+_TARGET_TUPLES: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+# Tirages max dans le tuple complet avant de se rabattre sur une copie du pool
+_MAX_REJECTION_DRAWS = 8
+
 
 def smart_hand_choice(
         in_range_hands: Set[str],
         out_range_hands: Set[str],
-        is_in_range: bool
+        is_in_range: bool,
+        context_id: Optional[int] = None
 ) -> str:
     """
     Choisit une main avec équilibre configurable entre aléatoire et borderline.
@@ -25,42 +40,72 @@ def smart_hand_choice(
         in_range_hands: Mains dans la range
         out_range_hands: Mains hors de la range
         is_in_range: True si on veut une main IN, False si OUT
+        context_id: Contexte dont les borderlines ont été précalculées (optionnel)
 
     Returns:
         Une main choisie intelligemment ou None
     """
-    target_hands = list(in_range_hands) if is_in_range else list(out_range_hands)
+    target_hands = in_range_hands if is_in_range else out_range_hands
 
     if not target_hands:
         return None
 
+    full_hands = _TARGET_TUPLES.get(context_id) if context_id is not None else None
+    if full_hands is not None:
+        full_hands = full_hands[0 if is_in_range else 1]
+
     # Tirer un dé : aléatoire ou borderline ?
     if random.random() < QUIZ_RANDOM_RATIO:
         # 🎲 Choix purement ALÉATOIRE (70% du temps)
-        hand = random.choice(target_hands)
-        print(f"[CHOICE] Aléatoire {'IN' if is_in_range else 'OUT'}: {hand}")
+        hand = _random_pick(target_hands, full_hands)
+        logger.debug("[CHOICE] Aléatoire %s: %s", 'IN' if is_in_range else 'OUT', hand)
         return hand
     else:
         # 🎯 Choix BORDERLINE (30% du temps)
-        borderline_in, borderline_out = get_borderline_hands(
-            in_range_hands,
-            out_range_hands,
-            BORDERLINE_PROXIMITY_THRESHOLD
-        )
+        precomputed = _BORDERLINE_CACHE.get(context_id) if context_id is not None else None
 
-        borderline_hands = borderline_in if is_in_range else borderline_out
+        if precomputed is not None:
+            # Borderlines de la range complète, restreintes au pool disponible
+            borderline_hands = precomputed[0 if is_in_range else 1]
+            if full_hands is None or len(target_hands) != len(full_hands):
+                borderline_hands = [h for h in borderline_hands if h in target_hands]
+        else:
+            borderline_in, borderline_out = get_borderline_hands(
+                in_range_hands,
+                out_range_hands,
+                BORDERLINE_PROXIMITY_THRESHOLD
+            )
+            borderline_hands = borderline_in if is_in_range else borderline_out
 
         if borderline_hands:
             hand = random.choice(borderline_hands)
-            print(f"[CHOICE] Borderline {'IN' if is_in_range else 'OUT'}: {hand}")
+            logger.debug("[CHOICE] Borderline %s: %s", 'IN' if is_in_range else 'OUT', hand)
             return hand
         else:
             # Fallback : aléatoire si pas de borderline
-            hand = random.choice(target_hands)
-            print(f"[CHOICE] Fallback aléatoire {'IN' if is_in_range else 'OUT'}: {hand}")
+            hand = _random_pick(target_hands, full_hands)
+            logger.debug("[CHOICE] Fallback aléatoire %s: %s", 'IN' if is_in_range else 'OUT', hand)
             return hand
 
 
+def _random_pick(pool, full_hands: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    Tire uniformément une main du pool.
+
+    Si le tuple complet de la range est connu (pool ⊆ full_hands), on tire dedans
+    et on rejette les mains hors pool : pas de copie du set à chaque question.
+    Pool complet (aucune main encore utilisée) : tirage direct dans le tuple.
+    """
+    if full_hands:
+        if len(pool) == len(full_hands):
+            return random.choice(full_hands)
+        for _ in range(_MAX_REJECTION_DRAWS):
+            hand = full_hands[random.randrange(len(full_hands))]
+            if hand in pool:
+                return hand
+    return random.choice(tuple(pool))
+
+
 def get_borderline_hands(
         in_range_hands: Set[str],
         out_range_hands: Set[str],
@@ -79,102 +124,151 @@ def get_borderline_hands(
     Returns:
         (borderline_in, borderline_out)
     """
-    if not in_range_hands or not out_range_hands:
-        return list(in_range_hands), list(out_range_hands)
+    # Les ranges sont statiques pendant un quiz : mémoïsation par empreinte des ensembles
+    borderline_in, borderline_out = _borderline_cached(
+        frozenset(in_range_hands),
+        frozenset(out_range_hands),
+        proximity_threshold
+    )
+    return list(borderline_in), list(borderline_out)
+
 
-    # Calculer les forces
-    strengths_in = {h: get_hand_strength(h) for h in in_range_hands}
-    strengths_out = {h: get_hand_strength(h) for h in out_range_hands}
+def clear_borderline_cache():
+    """Vide le cache des borderlines (à appeler après modification d'une range)"""
+    _borderline_cached.cache_clear()
 
-    # Trier les mains IN par force décroissante
-    sorted_in = sorted(in_range_hands, key=lambda h: strengths_in[h], reverse=True)
 
-    borderline_in = []
+def precompute_context_borderlines(context_id: int, in_range_hands: Set[str]):
+    """
+    Calcule une seule fois les borderlines de la range principale d'un contexte
+    (IN = range, OUT = toutes les autres mains) pour les réutiliser à chaque question.
 
-    # 🎯 Trouver les frontières de la range IN
-    for i, hand in enumerate(sorted_in):
-        current_strength = strengths_in[hand]
-        is_border = False
+    Args:
+        context_id: ID du contexte
+        in_range_hands: Mains de la range principale
+    """
+    if context_id in _BORDERLINE_CACHE:
+        return
 
-        # Regarder en DESSOUS (main plus faible suivante)
-        if i < len(sorted_in) - 1:
-            next_hand = sorted_in[i + 1]
-            next_strength = strengths_in[next_hand]
-            gap_below = current_strength - next_strength
+    in_fs = frozenset(in_range_hands)
+    out_fs = ALL_POKER_HANDS_FS - in_fs
+    _BORDERLINE_CACHE[context_id] = _borderline_cached(in_fs, out_fs, BORDERLINE_PROXIMITY_THRESHOLD)
+    _TARGET_TUPLES[context_id] = (tuple(in_fs), tuple(out_fs))
 
-            if gap_below > 5:  # Gap significatif = frontière
-                is_border = True
-                print(
-                    f"  [BORDER IN] {hand}({current_strength}) : gap de {gap_below} vers {next_hand}({next_strength})")
-        else:
-            # C'est la main la plus faible de la range → toujours borderline
-            is_border = True
-            print(f"  [BORDER IN] {hand}({current_strength}) : main la plus faible de la range")
-
-        # Regarder si une main OUT est proche JUSTE EN DESSOUS
-        if not is_border:
-            closest_out_below = None
-            min_distance = float('inf')
-
-            for hand_out, strength_out in strengths_out.items():
-                if strength_out < current_strength:  # Seulement en dessous
-                    distance = current_strength - strength_out
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_out_below = hand_out
-
-            if closest_out_below and min_distance <= proximity_threshold:
-                # Vérifier qu'il n'y a pas de main IN entre les deux
-                has_in_between = any(
-                    current_strength > s > strengths_out[closest_out_below]
-                    for s in strengths_in.values()
-                )
-
-                if not has_in_between:
-                    is_border = True
-                    print(
-                        f"  [BORDER IN] {hand}({current_strength}) : {closest_out_below}({strengths_out[closest_out_below]}) OUT proche en dessous (distance {min_distance})")
-
-        if is_border:
-            borderline_in.append(hand)
-
-    # 🎯 Trouver les mains OUT proches d'une frontière IN
-    borderline_out = []
-
-    for hand_out, strength_out in strengths_out.items():
-        # Trouver la main IN la plus proche
-        closest_in = None
-        min_distance = float('inf')
-
-        for hand_in, strength_in in strengths_in.items():
-            distance = abs(strength_out - strength_in)
-            if distance < min_distance:
-                min_distance = distance
-                closest_in = hand_in
-
-        if min_distance <= proximity_threshold:
-            borderline_out.append(hand_out)
-            print(
-                f"  [BORDER OUT] {hand_out}({strength_out}) : proche de {closest_in}({strengths_in[closest_in]}) IN (distance {min_distance})")
-
-    print(f"[BORDERLINE] IN : {len(borderline_in)} mains → {borderline_in}")
-    print(f"[BORDERLINE] OUT : {len(borderline_out)} mains → {borderline_out[:10]}...")
+
+def invalidate_context_borderlines(context_id: Optional[int] = None):
+    """Oublie les borderlines précalculées d'un contexte (ou de tous si None)"""
+    if context_id is None:
+        _BORDERLINE_CACHE.clear()
+        _TARGET_TUPLES.clear()
+    else:
+        _BORDERLINE_CACHE.pop(context_id, None)
+        _TARGET_TUPLES.pop(context_id, None)
+
+
+@lru_cache(maxsize=512)
+def _borderline_cached(
+        in_range_hands: frozenset,
+        out_range_hands: frozenset,
+        proximity_threshold: int
+) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Calcul effectif des borderlines (voir get_borderline_hands), résultat immuable"""
+    if not in_range_hands or not out_range_hands:
+        return tuple(in_range_hands), tuple(out_range_hands)
+
+    # Calculer les forces via la table dense (50 par défaut pour une main inconnue)
+    strengths_in = _hand_strengths(in_range_hands)
+    strengths_out = _hand_strengths(out_range_hands)
+
+    # Trier les mains IN par force décroissante (tri unique, réutilisé par le fallback)
+    sorted_in = sorted(in_range_hands, key=strengths_in.__getitem__, reverse=True)
+
+    # Noyau numérique : uniquement des forces entières, aucun nom de main
+    hands_out = list(strengths_out)
+    flags_in, flags_out = _borderline_kernel(
+        [strengths_in[h] for h in sorted_in],
+        [strengths_out[h] for h in hands_out],
+        proximity_threshold
+    )
+
+    borderline_in = [hand for hand, flag in zip(sorted_in, flags_in) if flag]
+    borderline_out = [hand for hand, flag in zip(hands_out, flags_out) if flag]
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[BORDERLINE] IN : %d mains → %s", len(borderline_in), borderline_in)
+        logger.debug("[BORDERLINE] OUT : %d mains → %s...", len(borderline_out), borderline_out[:10])
 
     # Fallback si vides
     if not borderline_in:
-        sorted_in_list = sorted(in_range_hands, key=lambda h: strengths_in[h])
-        borderline_in = sorted_in_list[:max(1, len(sorted_in_list) // 5)]
-        print(f"[BORDERLINE] Fallback IN : {borderline_in[:3]}")
+        borderline_in = sorted_in[::-1][:max(1, len(sorted_in) // 5)]
+        logger.debug("[BORDERLINE] Fallback IN : %s", borderline_in[:3])
 
     if not borderline_out:
-        sorted_out = sorted(out_range_hands, key=lambda h: strengths_out[h], reverse=True)
+        sorted_out = sorted(out_range_hands, key=strengths_out.__getitem__, reverse=True)
         borderline_out = sorted_out[:max(1, len(sorted_out) // 5)]
-        print(f"[BORDERLINE] Fallback OUT : {borderline_out[:3]}")
+        logger.debug("[BORDERLINE] Fallback OUT : %s", borderline_out[:3])
+
+    return tuple(borderline_in), tuple(borderline_out)
 
-    return borderline_in, borderline_out
 
+def _borderline_kernel(
+        in_desc: List[int],
+        out_values: List[int],
+        proximity_threshold: int
+) -> Tuple[List[bool], List[bool]]:
+    """
+    Noyau du calcul des borderlines, en une passe sur des forces entières.
+
+    Args:
+        in_desc: Forces des mains IN triées par ordre décroissant
+        out_values: Forces des mains OUT
+        proximity_threshold: Distance max pour être "proche"
 
-def get_all_hands_not_in_ranges(in_range_hands: Set[str]) -> Set[str]:
+    Returns:
+        (flags_in, flags_out) : booléens alignés sur in_desc et out_values
+    """
+    in_asc = in_desc[::-1]
+    out_asc = sorted(out_values)
+    last = len(in_desc) - 1
+
+    # 🎯 Frontières de la range IN
+    flags_in = []
+    for i, current in enumerate(in_desc):
+        # Gap significatif vers la main suivante, ou main la plus faible de la range
+        if i == last or current - in_desc[i + 1] > 5:
+            flags_in.append(True)
+            continue
+
+        # Main OUT la plus forte strictement en dessous (recherche dichotomique)
+        idx = bisect_left(out_asc, current)
+        if idx == 0 or current - out_asc[idx - 1] > proximity_threshold:
+            flags_in.append(False)
+            continue
+
+        # Frontière seulement s'il n'y a pas de main IN entre les deux
+        below = out_asc[idx - 1]
+        flags_in.append(bisect_left(in_asc, current) <= bisect_right(in_asc, below))
+
+    # 🎯 Mains OUT proches d'une main IN : voisins immédiats dans les forces IN triées
+    flags_out = []
+    for strength_out in out_values:
+        idx = bisect_left(in_asc, strength_out)
+        min_distance = min(abs(strength_out - s) for s in in_asc[max(0, idx - 1):idx + 1])
+        flags_out.append(min_distance <= proximity_threshold)
+
+    return flags_in, flags_out
+
+
+def _hand_strengths(hands: Set[str]) -> Dict[str, int]:
+    """Retourne {main: force} en indexant HAND_STRENGTH_TABLE par identifiant de main"""
+    strengths = {}
+    for h in hands:
+        hand_id = HAND_ID.get(h)
+        strengths[h] = HAND_STRENGTH_TABLE[hand_id] if hand_id is not None else 50
+    return strengths
+
+
+def get_all_hands_not_in_ranges(in_range_hands: Set[str]) -> FrozenSet[str]:
     """
     Récupère toutes les mains qui ne sont pas dans les ranges.
 
@@ -182,6 +276,6 @@ def get_all_hands_not_in_ranges(in_range_hands: Set[str]) -> Set[str]:
         in_range_hands: Ensemble des mains dans les ranges
 
     Returns:
-        Ensemble des mains hors ranges
+        Ensemble (figé) des mains hors ranges
     """
-    return set(h for h in ALL_POKER_HANDS if h not in in_range_hands)
\ No newline at end of file
+    return ALL_POKER_HANDS_FS.difference(in_range_hands)
\ No newline at end of file
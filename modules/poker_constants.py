@@ -91,11 +91,42 @@ HAND_STRENGTH = {
     '32o': 17
 }
 
+# 🆕 Ensemble figé des 169 mains (différences ensemblistes en C)
+ALL_POKER_HANDS_FS = frozenset(ALL_POKER_HANDS)
+
+# 🆕 Identifiant dense de chaque main (position dans ALL_POKER_HANDS)
+HAND_ID = {hand: i for i, hand in enumerate(ALL_POKER_HANDS)}
+
+# 🆕 Forces indexées par identifiant de main, figées en un blob de 169 octets (forces 1-100)
+HAND_STRENGTH_TABLE = bytes(HAND_STRENGTH.get(hand, 50) for hand in ALL_POKER_HANDS)
+
 # 🆕 ORDRE IMMUABLE DES BOUTONS : FOLD → CALL/CHECK → RAISE
 # CHECK remplace CALL quand l'action est gratuite (BB check par exemple)
 # ISO remplace RAISE pour le contexte vs_limpers
 IMMUTABLE_BUTTON_ORDER = ['FOLD', 'CALL', 'CHECK', 'RAISE', 'ISO', 'OPEN']
 
+class _ActionOrder(dict):
+    """Table de priorité des actions : 999 pour une action inconnue (sans insertion)"""
+
+    def __missing__(self, key):
+        return 999
+
+
+# Mapping de priorité : plus petit = plus à gauche (construit une seule fois)
+_ACTION_ORDER = _ActionOrder({
+    'FOLD': 1,
+    'CHECK': 2,  # Remplace CALL quand action gratuite
+    'CALL': 2,   # Même position que CHECK
+    'RAISE': 3,
+    'ISO': 3,    # Remplace RAISE pour vs_limpers
+    'OPEN': 3,   # Remplace RAISE pour open
+    '3BET': 3,   # Considéré comme RAISE
+    '4BET': 3,   # Considéré comme RAISE
+    'SQUEEZE': 3,  # Considéré comme RAISE
+    'ALLIN': 3   # Considéré comme RAISE
+})
+
+
 def sort_actions(actions):
     """
     🔧 CORRECTION : Trie les actions dans l'ordre IMMUABLE.
@@ -110,22 +141,8 @@ def sort_actions(actions):
     """
     if not actions:
         return []
-    
-    # Mapping de priorité : plus petit = plus à gauche
-    order_map = {
-        'FOLD': 1,
-        'CHECK': 2,  # Remplace CALL quand action gratuite
-        'CALL': 2,   # Même position que CHECK
-        'RAISE': 3,
-        'ISO': 3,    # Remplace RAISE pour vs_limpers
-        'OPEN': 3,   # Remplace RAISE pour open
-        '3BET': 3,   # Considéré comme RAISE
-        '4BET': 3,   # Considéré comme RAISE
-        'SQUEEZE': 3,  # Considéré comme RAISE
-        'ALLIN': 3   # Considéré comme RAISE
-    }
-    
-    return sorted(actions, key=lambda x: order_map.get(x, 999))
+
+    return sorted(actions, key=_ACTION_ORDER.__getitem__)
 
 # Normalisation des actions (fusionner value/bluff)
 ACTION_NORMALIZATION = {
@@ -141,6 +158,9 @@ ACTION_NORMALIZATION = {
     'CALL_4BET': 'CALL',   # flat vs 4bet
 }
 
+# Table de normalize_action : alias fusionnés + labels vides → None (un seul dict.get)
+_NORMALIZE_LOOKUP = {**ACTION_NORMALIZATION, 'None': None, 'null': None}
+
 # Traductions françaises des actions
 ACTION_TRANSLATIONS = {
     'open': 'ouvrez avec',
@@ -159,9 +179,9 @@ def normalize_action(action):
     Normalise une action en fusionnant value/bluff.
     Retourne l'action canonique (ex: '3BET', '4BET', 'CALL', 'RAISE', 'FOLD', 'ALLIN').
     """
-    if not action or action in ('None', 'null', ''):
+    if not action:
         return None
-    return ACTION_NORMALIZATION.get(action, action)
+    return _NORMALIZE_LOOKUP.get(action, action)
 
 def translate_action(action):
     """Traduit une action en français pour les questions."""
@@ -171,7 +191,8 @@ def translate_action(action):
 
 def get_hand_strength(hand):
     """Récupère la force d'une main (0-100, default 50)."""
-    return HAND_STRENGTH.get(hand, 50)
+    hand_id = HAND_ID.get(hand)
+    return HAND_STRENGTH_TABLE[hand_id] if hand_id is not None else 50
 
 AVAILABLE_LABELS = {
     'OPEN': 'Open',
@@ -5,20 +5,127 @@ Générateur de questions de quiz avec support multiway (squeeze, vs_limpers)
 🎚️ Support de l'agressivité de la table (low/medium/high)
 """
 
+import logging
 import sqlite3
 import random
 import json
-from typing import Dict, List, Optional, Set
+from functools import lru_cache, partial
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
 from pathlib import Path
 
 # Imports locaux
-from poker_constants import (
-    ALL_POKER_HANDS, sort_actions, normalize_action, translate_action
+from poker_constants import sort_actions, normalize_action
+from hand_selector import (
+    smart_hand_choice, get_all_hands_not_in_ranges, precompute_context_borderlines
 )
-from hand_selector import smart_hand_choice, get_all_hands_not_in_ranges
 from drill_down_generator import DrillDownGenerator  # 🆕
 from aggression_settings import get_aggression_settings  # 🎚️
 
+logger = logging.getLogger(__name__)
+
+# Clés du dict 'context' d'un bundle, dans l'ordre des colonnes de SQL_CONTEXT_BUNDLES
+CONTEXT_FIELDS = ('id', 'display_name', 'table_format', 'hero_position',
+                  'primary_action', 'vs_position', 'stack_depth', 'action_sequence')
+
+# Requête de load_contexts ({placeholders} = '?,?,...') : contextes et ranges en un
+# seul aller-retour. Texte identique d'un appel à l'autre pour un même nombre d'IDs,
+# donc réutilisé par le cache de requêtes sqlite3
+SQL_CONTEXT_BUNDLES = """
+    SELECT
+        rc.id, rc.display_name, rc.table_format, rc.hero_position,
+        rc.primary_action, rc.vs_position, rc.stack_depth, rc.action_sequence,
+        r.id, r.range_key, r.name, r.label_canon, r.action_sequence,
+        GROUP_CONCAT(DISTINCT rh.hand) as hands
+    FROM range_contexts rc
+    LEFT JOIN ranges r ON r.context_id = rc.id
+    LEFT JOIN range_hands rh ON rh.range_id = r.id
+    WHERE rc.id IN ({placeholders}) AND rc.quiz_ready = 1
+    GROUP BY rc.id, r.id
+    ORDER BY rc.id, r.range_key
+"""
+
+# Actions dont le scénario (opener, callers, limpers) est tiré au hasard à chaque question
+_RANDOM_SCENARIO_ACTIONS = frozenset({'defense', 'squeeze', 'vs_limpers'})
+
+@lru_cache(maxsize=1024)
+def _action_options(
+        correct_answer: str,
+        main_range_action: str,
+        primary: str,
+        hero_position: str
+) -> Tuple[str, ...]:
+    """
+    Options de réponse d'une question simple (voir QuizGenerator._generate_action_options).
+
+    Fonction pure de ses arguments : mémoïsée, le nombre de combinaisons est très réduit.
+    """
+    options = []
+
+    # 1. Toujours inclure la bonne réponse
+    if correct_answer:
+        options.append(correct_answer)
+
+    # 2. 🎯 NE JAMAIS AJOUTER 'DEFENSE' ou 'OPEN' - ce ne sont pas des actions jouables
+    # Convertir OPEN → RAISE si nécessaire
+    if main_range_action and main_range_action not in options:
+        if main_range_action == 'DEFENSE':
+            pass  # Ne pas ajouter DEFENSE
+        elif main_range_action == 'OPEN':
+            if 'RAISE' not in options:
+                options.append('RAISE')
+        else:
+            options.append(main_range_action)
+
+    # 3. FOLD si pas déjà présent
+    # Si BB et action de check (pas de relance)
+    if hero_position == 'BB' and 'check' in primary:
+        if 'CHECK' not in options:
+            options.append('CHECK')
+    else:
+        # Sinon, toujours FOLD
+        if 'FOLD' not in options:
+            options.append('FOLD')
+
+    # 4. ✗ NE PAS utiliser les sous-ranges pour les questions simples
+
+    # 5. Si on a moins de 3 options, ajouter des distracteurs contextuels
+    if len(options) < 3:
+        distractors = _contextual_distractors(primary)
+        for distractor in distractors:
+            if distractor not in options:
+                options.append(distractor)
+                if len(options) >= 3:  # S'arrêter à 3 options
+                    break
+
+    # Trier dans un ordre fixe
+    return tuple(sort_actions(options))
+
+
+def _contextual_distractors(primary_action: str) -> List[str]:
+    """
+    Retourne des distracteurs pertinents selon le contexte.
+
+    Args:
+        primary_action: Action principale du contexte
+
+    Returns:
+        Liste de distracteurs (max 2 pour avoir 3 options total)
+    """
+    if 'defense' in primary_action:
+        return ['CALL', 'RAISE']  # 🎯 Actions vs open (RAISE au lieu de 3BET pour l'UI)
+    elif 'open' in primary_action:
+        return ['CALL']  # limp comme alternative (RAISE = redondant avec OPEN)
+    elif 'squeeze' in primary_action:
+        return ['CALL']  # overcall comme alternative
+    elif 'vs_limpers' in primary_action or 'iso' in primary_action:
+        return ['CALL', 'ISO']  # overcall ou iso
+    elif 'check' in primary_action:
+        return ['RAISE']  # raise si checké vers nous
+    elif '3bet' in primary_action:
+        return ['CALL']  # call le 3bet
+    else:
+        return ['CALL']  # générique
+
 
 class QuizGenerator:
     """Génère des questions de quiz depuis les contextes validés"""
@@ -40,7 +147,8 @@ class QuizGenerator:
         # 🎚️ Paramètres d'agressivité
         self.aggression_level = aggression_level
         self.aggression = get_aggression_settings(aggression_level)
-        print(f"[QUIZ GEN] 🎚️ Agressivité: {aggression_level.upper()} - {self.aggression.get('description', '')}")
+        logger.debug("[QUIZ GEN] 🎚️ Agressivité: %s - %s",
+                     aggression_level.upper(), self.aggression.get('description', ''))
 
         # 🆕 Générateur de questions à tiroirs (avec agressivité)
         self.drill_down_gen = DrillDownGenerator(aggression_settings=self.aggression)
@@ -59,7 +167,70 @@ class QuizGenerator:
         conn.row_factory = sqlite3.Row
         return conn
 
-    def generate_question(self, context_id: int, used_hands: set = None) -> Optional[Dict]:
+    def load_contexts(self, context_ids: List[int], conn: sqlite3.Connection = None) -> Dict[int, Dict]:
+        """
+        Charge en une requête les contextes quiz_ready demandés et leurs ranges.
+
+        Args:
+            context_ids: IDs des contextes
+            conn: Connexion existante à réutiliser (non fermée ici) ; sinon une
+                  connexion dédiée est ouverte puis fermée
+
+        Returns:
+            {context_id: {'context': dict, 'ranges': [dict, ...]}}
+            (les contextes absents ou non prêts sont omis)
+        """
+        context_ids = list(dict.fromkeys(context_ids))
+        if not context_ids:
+            return {}
+
+        placeholders = ','.join('?' * len(context_ids))
+        owns_conn = conn is None
+        if owns_conn:
+            conn = self.get_connection()
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SQL_CONTEXT_BUNDLES.format(placeholders=placeholders), context_ids)
+
+            # Une ligne par range (colonnes du contexte répétées) ; un contexte
+            # sans range donne une seule ligne aux colonnes de range NULL
+            bundles = {}
+            for row in cursor.fetchall():
+                bundle = bundles.get(row[0])
+                if bundle is None:
+                    context = dict(zip(CONTEXT_FIELDS, row[:8]))
+
+                    # Parser action_sequence JSON
+                    if context.get('action_sequence'):
+                        try:
+                            context['action_sequence'] = json.loads(context['action_sequence'])
+                        except:
+                            context['action_sequence'] = None
+
+                    bundle = bundles[row[0]] = {'context': context, 'ranges': []}
+
+                hands_str = row[13]
+                if hands_str:
+                    bundle['ranges'].append({
+                        'id': row[8],
+                        'range_key': row[9],
+                        'name': row[10],
+                        'label_canon': row[11],
+                        'action_sequence': row[12],
+                        # Ensemble figé : tests d'appartenance en O(1), réutilisé tel quel
+                        'hands': frozenset(hands_str.split(','))
+                    })
+
+            return bundles
+
+        finally:
+            if owns_conn:
+                conn.close()
+
+    def generate_question(self, context_id: int, used_hands: set = None,
+                          force_simple: bool = False,
+                          max_steps: Optional[int] = None) -> Optional[Dict]:
         """
         Génère une question pour un contexte donné.
         🆕 Décide entre question simple ou drill_down.
@@ -68,118 +239,141 @@ class QuizGenerator:
         Args:
             context_id: ID du contexte
             used_hands: Set des mains abstraites déjà utilisées dans le quiz
+            force_simple: True pour interdire le drill-down (voir generate_question_from_bundle)
+            max_steps: Nombre maximal de sous-questions (voir generate_question_from_bundle)
 
         Returns:
             Question dict ou None
         """
-        if used_hands is None:
-            used_hands = set()
-        conn = self.get_connection()
+        bundle = self.load_contexts([context_id]).get(context_id)
+        if bundle is None:
+            logger.debug("[QUIZ] ❌ SKIP: Contexte ID=%s non trouvé en DB", context_id)
+            return None
 
-        try:
-            # Récupérer le contexte
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    id, display_name, table_format, hero_position, 
-                    primary_action, vs_position, stack_depth, action_sequence
-                FROM range_contexts 
-                WHERE id = ? AND quiz_ready = 1
-            """, (context_id,))
-
-            context_row = cursor.fetchone()
-            if not context_row:
-                print(f"[QUIZ] ❌ SKIP: Contexte ID={context_id} non trouvé en DB")
-                return None
+        return self.generate_question_from_bundle(bundle, used_hands, force_simple, max_steps)
 
-            context = dict(context_row)
+    def generate_question_from_bundle(self, bundle: Dict, used_hands: set = None,
+                                      force_simple: bool = False,
+                                      max_steps: Optional[int] = None) -> Optional[Dict]:
+        """
+        Génère une question à partir d'un contexte déjà chargé (voir load_contexts),
+        sans aucune requête SQL.
 
-            # Log du contexte pour debug
-            print(f"\n[QUIZ CONTEXT] ID={context['id']}")
-            print(f"  📋 Name: {context['display_name']}")
-            print(f"  🎯 Action: {context['primary_action']}")
-            print(f"  📍 Position: {context['hero_position']} ({context['table_format']})")
+        Args:
+            bundle: {'context': dict, 'ranges': [dict, ...]}
+            used_hands: Set des mains abstraites déjà utilisées dans le quiz
+            force_simple: True pour n'autoriser qu'une question simple (une seule
+                sous-question), par exemple quand il reste peu de place dans le quiz
+            max_steps: Nombre maximal de sous-questions d'un drill-down (places
+                restantes dans le quiz), None = illimité
 
-            # Parser action_sequence JSON
+        Returns:
+            Question dict ou None
+        """
+        if used_hands is None:
+            used_hands = set()
+
+        # Copie : la question garde son propre context_info (main, vilain fixé...)
+        context = dict(bundle['context'])
+        ranges = bundle['ranges']
+
+        # Log du contexte pour debug (rien n'est formaté hors niveau DEBUG)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("[QUIZ CONTEXT] ID=%s", context['id'])
+            logger.debug("  📋 Name: %s", context['display_name'])
+            logger.debug("  🎯 Action: %s", context['primary_action'])
+            logger.debug("  📍 Position: %s (%s)", context['hero_position'], context['table_format'])
             if context.get('action_sequence'):
-                try:
-                    context['action_sequence'] = json.loads(context['action_sequence'])
-                    if context['action_sequence']:
-                        print(f"  🔗 Sequence: {context['action_sequence']}")
-                except:
-                    context['action_sequence'] = None
-
-            # Récupérer les ranges
-            cursor.execute("""
-                SELECT 
-                    r.id, r.range_key, r.name, r.label_canon,
-                    r.action_sequence,
-                    GROUP_CONCAT(DISTINCT rh.hand) as hands
-                FROM ranges r
-                LEFT JOIN range_hands rh ON r.id = rh.range_id
-                WHERE r.context_id = ?
-                GROUP BY r.id
-                ORDER BY r.range_key
-            """, (context_id,))
-
-            ranges = []
-            for row in cursor.fetchall():
-                action_seq = row[4]
-                hands_str = row[5]
-                if hands_str:
-                    ranges.append({
-                        'id': row[0],
-                        'range_key': row[1],
-                        'name': row[2],
-                        'label_canon': row[3],
-                        'action_sequence': action_seq,
-                        'hands': hands_str.split(',')
-                    })
+                logger.debug("  🔗 Sequence: %s", context['action_sequence'])
 
-            if not ranges:
-                print(f"[QUIZ] ❌ Aucune range trouvée pour ce contexte")
-                return None
+        if not ranges:
+            logger.debug("[QUIZ] ❌ Aucune range trouvée pour ce contexte")
+            return None
 
-            print(f"  📊 {len(ranges)} ranges trouvées:")
+        if debug:
+            logger.debug("  📊 %s ranges trouvées:", len(ranges))
             for r in ranges[:5]:
                 hands_count = len(r['hands']) if r['hands'] else 0
-                print(f"    - Range {r['range_key']}: {r['name']} (label={r['label_canon']}, {hands_count} mains)")
+                logger.debug("    - Range %s: %s (label=%s, %s mains)",
+                             r['range_key'], r['name'], r['label_canon'], hands_count)
             if len(ranges) > 5:
-                print(f"    ... et {len(ranges) - 5} autres ranges")
-
-            # 🆕 DÉCISION : drill_down ou simple ?
-            can_drill = self.drill_down_gen.can_generate_drill_down(ranges)
-
-            if can_drill:
-                # 🎚️ Probabilité de drill-down selon l'agressivité
-                use_drill_down_prob = self.aggression['use_drill_down_prob']
-                use_drill_down = random.random() < use_drill_down_prob
-                print(f"  🎲 Type de question: {'DRILL_DOWN' if use_drill_down else 'SIMPLE'} (prob={use_drill_down_prob*100:.0f}%)")
-
-                if use_drill_down:
-                    # Préparer les mains pour drill_down
-                    main_range = self._get_main_range(ranges)
-                    if main_range and main_range['hands']:
-                        in_range_hands = set(main_range['hands'])
-                        out_of_range_hands = get_all_hands_not_in_ranges(in_range_hands)
-
-                        # Tenter de générer drill_down avec évitement des mains utilisées
-                        drill_question = self.drill_down_gen.generate_drill_down_question(
-                            context, ranges, in_range_hands, out_of_range_hands, used_hands
-                        )
-
-                        if drill_question:
-                            # Ajouter la main au contexte pour _format_level_question
-                            context['hand'] = drill_question['hand']
-                            return drill_question
-                        else:
-                            print("  ⚠️  Drill_down échoué, fallback sur simple")
-
-            # Fallback : générer question simple avec évitement des mains utilisées
-            return self._generate_simple_question(context, ranges, used_hands)
+                logger.debug("    ... et %s autres ranges", len(ranges) - 5)
+
+        # 🆕 DÉCISION : drill_down ou simple ?
+        can_drill = not force_simple and self.drill_down_gen.can_generate_drill_down(ranges)
+
+        if can_drill:
+            # 🎚️ Probabilité de drill-down selon l'agressivité
+            use_drill_down_prob = self.aggression['use_drill_down_prob']
+            use_drill_down = random.random() < use_drill_down_prob
+            logger.debug("  🎲 Type de question: %s (prob=%.0f%%)",
+                         'DRILL_DOWN' if use_drill_down else 'SIMPLE', use_drill_down_prob * 100)
+
+            if use_drill_down:
+                # Préparer les mains pour drill_down
+                hand_sets = self._bundle_hand_sets(bundle)
+                if hand_sets:
+                    in_range_hands, out_of_range_hands = hand_sets
+
+                    # Tenter de générer drill_down avec évitement des mains utilisées
+                    drill_question = self.drill_down_gen.generate_drill_down_question(
+                        context, ranges, in_range_hands, out_of_range_hands, used_hands,
+                        max_steps=max_steps
+                    )
+
+                    if drill_question:
+                        # Ajouter la main au contexte pour _format_level_question
+                        context['hand'] = drill_question['hand']
+                        return drill_question
+                    else:
+                        logger.debug("  ⚠️  Drill_down échoué, fallback sur simple")
 
-        finally:
-            conn.close()
+        # Fallback : générer question simple avec évitement des mains utilisées
+        return self._generate_simple_question(context, ranges, used_hands,
+                                              hand_sets=self._bundle_hand_sets(bundle),
+                                              answer_cache=self._bundle_answers(bundle),
+                                              formatter=self._bundle_formatter(bundle))
+
+    def _bundle_hand_sets(self, bundle: Dict) -> Optional[Tuple[FrozenSet[str], FrozenSet[str]]]:
+        """
+        Mains IN/OUT de la range principale d'un contexte chargé, calculées
+        au premier besoin puis conservées dans le bundle pour les tentatives suivantes.
+        """
+        if 'hand_sets' not in bundle:
+            main_range = self._get_main_range(bundle['ranges'])
+            if main_range and main_range['hands']:
+                in_range_hands = main_range['hands']
+                bundle['hand_sets'] = (in_range_hands, get_all_hands_not_in_ranges(in_range_hands))
+            else:
+                bundle['hand_sets'] = None
+        return bundle['hand_sets']
+
+    def _bundle_answers(self, bundle: Dict) -> Dict[str, Optional[str]]:
+        """
+        Bonnes réponses IN par main pour un contexte chargé (voir _in_range_answer).
+
+        Pour un contexte DEFENSE, index inversé main → action des sous-ranges
+        construit en une passe (première sous-range valide gagnante, comme
+        _find_subrange_action) : plus de parcours des sous-ranges par question.
+        """
+        if 'answers' not in bundle:
+            answers = {}
+            ranges = bundle['ranges']
+            main_range = self._get_main_range(ranges)
+            if main_range and normalize_action(main_range.get('label_canon')) == 'DEFENSE':
+                for r in ranges:
+                    if r['range_key'] == '1' or not r['hands']:
+                        continue
+                    normalized = normalize_action(r.get('label_canon'))
+                    if not normalized:
+                        continue
+                    # 🎯 CONVERSION CONTEXTUELLE : 3BET → RAISE pour l'affichage en DEFENSE
+                    answer = 'RAISE' if normalized == '3BET' else normalized
+                    for hand in r['hands']:
+                        answers.setdefault(hand, answer)
+            bundle['answers'] = answers
+        return bundle['answers']
 
     def _get_main_range(self, ranges: List[Dict]) -> Optional[Dict]:
         """Retourne la range principale (range_key='1')"""
@@ -188,7 +382,15 @@ class QuizGenerator:
                 return r
         return None
 
-    def _generate_simple_question(self, context: Dict, ranges: List[Dict], used_hands: set = None) -> Optional[Dict]:
+    def _generate_simple_question(
+            self,
+            context: Dict,
+            ranges: List[Dict],
+            used_hands: set = None,
+            hand_sets: Optional[Tuple[FrozenSet[str], FrozenSet[str]]] = None,
+            answer_cache: Optional[Dict[str, Optional[str]]] = None,
+            formatter: Optional[Callable[[str], str]] = None
+    ) -> Optional[Dict]:
         """
         Génère une question simple sur l'action principale.
         🆕 v4.3.7 : Évite de réutiliser les mêmes mains abstraites
@@ -197,6 +399,9 @@ class QuizGenerator:
             context: Dictionnaire du contexte
             ranges: Liste des ranges
             used_hands: Set des mains abstraites déjà utilisées
+            hand_sets: Mains (IN, OUT) de la range principale déjà calculées (optionnel)
+            answer_cache: Bonnes réponses IN déjà résolues, par main (optionnel)
+            formatter: Formateur de question spécialisé pour ce contexte (optionnel)
 
         Returns:
             Question dict ou None
@@ -208,41 +413,52 @@ class QuizGenerator:
         main_range = self._get_main_range(ranges)
 
         if not main_range or not main_range['hands']:
-            print(f"[QUIZ] SKIP: Pas de range principale pour context_id={context['id']}")
+            logger.debug("[QUIZ] SKIP: Pas de range principale pour context_id=%s", context['id'])
             return None
 
         correct_action = main_range.get('label_canon')
 
         if not correct_action or correct_action == 'None' or correct_action == '':
-            print(f"[QUIZ] SKIP: label_canon invalide pour range principale")
+            logger.debug("[QUIZ] SKIP: label_canon invalide pour range principale")
             return None
 
         normalized_action = normalize_action(correct_action)
 
         if not normalized_action:
-            print(f"[QUIZ] SKIP: normalisation échouée pour '{correct_action}'")
+            logger.debug("[QUIZ] SKIP: normalisation échouée pour '%s'", correct_action)
             return None
 
         # Préparer les mains IN et OUT
-        in_range_hands = set(main_range['hands'])
-        out_of_range_hands = get_all_hands_not_in_ranges(in_range_hands)
+        if hand_sets:
+            in_range_hands, out_of_range_hands = hand_sets
+        else:
+            # frozenset() d'un frozenset ne copie pas
+            in_range_hands = frozenset(main_range['hands'])
+            out_of_range_hands = get_all_hands_not_in_ranges(in_range_hands)
+
+        # Borderlines de la range calculées une fois par contexte
+        precompute_context_borderlines(context['id'], in_range_hands)
         
-        # 🆕 v4.3.7 : Filtrer les mains déjà utilisées
-        available_in_range = in_range_hands - used_hands
-        available_out_range = out_of_range_hands - used_hands
+        # 🆕 v4.3.7 : Filtrer les mains déjà utilisées (pas de copie en début de quiz)
+        if used_hands:
+            available_in_range = in_range_hands - used_hands
+            available_out_range = out_of_range_hands - used_hands
+        else:
+            available_in_range = in_range_hands
+            available_out_range = out_of_range_hands
         
         # Si on a fait le tour de TOUTES les mains, réinitialiser
         if not available_in_range and not available_out_range:
-            print(f"[QUIZ] ♻️  Toutes les mains utilisées, réinitialisation du pool")
+            logger.debug("[QUIZ] ♻️  Toutes les mains utilisées, réinitialisation du pool")
             available_in_range = in_range_hands
             available_out_range = out_of_range_hands
         # Si seulement in_range est vide, forcer out_range
         elif not available_in_range:
-            print(f"[QUIZ] ⚠️  Plus de mains in-range disponibles, force out-range")
+            logger.debug("[QUIZ] ⚠️  Plus de mains in-range disponibles, force out-range")
             is_in_range = False
         # Si seulement out_range est vide, forcer in_range
         elif not available_out_range:
-            print(f"[QUIZ] ⚠️  Plus de mains out-range disponibles, force in-range")
+            logger.debug("[QUIZ] ⚠️  Plus de mains out-range disponibles, force in-range")
             is_in_range = True
         else:
             # 50% de chances in/out avec choix intelligent
@@ -250,42 +466,28 @@ class QuizGenerator:
 
         if is_in_range:
             # Main DANS la range (utiliser le pool filtré)
-            hand = smart_hand_choice(available_in_range, available_out_range, is_in_range=True)
-
-            # Si c'est un contexte DEFENSE, trouver l'action dans les sous-ranges
-            if normalized_action == 'DEFENSE':
-                correct_answer = self._find_subrange_action(hand, ranges)
-                if not correct_answer:
-                    print(f"[QUIZ] SKIP: Main {hand} dans defense mais sans action dans sous-ranges")
-                    return None
-
-                # 🎯 CONVERSION CONTEXTUELLE : 3BET → RAISE pour l'affichage en DEFENSE
-                if correct_answer == '3BET':
-                    correct_answer = 'RAISE'
-            else:
-                # 🆕 CONVERSION : OPEN → RAISE pour l'UI
-                if normalized_action == 'OPEN':
-                    correct_answer = 'RAISE'
-                else:
-                    # Conversion : OPEN → RAISE pour l'UI
-                    if normalized_action == 'OPEN':
-                        correct_answer = 'RAISE'
-                    else:
-                        correct_answer = normalized_action
+            hand = smart_hand_choice(available_in_range, available_out_range, is_in_range=True,
+                                     context_id=context['id'])
 
-            print(f"[QUIZ] ✅ Question IN-RANGE: {hand} → {correct_answer}")
-            print(
-                f"       Context: '{context['display_name']}' (ID={context['id']}, action={context['primary_action']})")
+            correct_answer = self._in_range_answer(hand, normalized_action, ranges, answer_cache)
+            if not correct_answer:
+                logger.debug("[QUIZ] SKIP: Main %s dans defense mais sans action dans sous-ranges", hand)
+                return None
+
+            logger.debug("[QUIZ] ✅ Question IN-RANGE: %s → %s", hand, correct_answer)
+            logger.debug("       Context: '%s' (ID=%s, action=%s)",
+                         context['display_name'], context['id'], context['primary_action'])
         else:
             # Main HORS de la range (utiliser le pool filtré)
-            hand = smart_hand_choice(available_in_range, available_out_range, is_in_range=False)
+            hand = smart_hand_choice(available_in_range, available_out_range, is_in_range=False,
+                                     context_id=context['id'])
             correct_answer = 'FOLD'
-            print(f"[QUIZ] ✅ Question OUT-OF-RANGE: {hand} → FOLD")
-            print(
-                f"       Context: '{context['display_name']}' (ID={context['id']}, action={context['primary_action']})")
+            logger.debug("[QUIZ] ✅ Question OUT-OF-RANGE: %s → FOLD", hand)
+            logger.debug("       Context: '%s' (ID=%s, action=%s)",
+                         context['display_name'], context['id'], context['primary_action'])
 
         if not hand:
-            print(f"[QUIZ] SKIP: Impossible de choisir une main")
+            logger.debug("[QUIZ] SKIP: Impossible de choisir une main")
             return None
 
         # Générer options
@@ -293,15 +495,15 @@ class QuizGenerator:
         options = [opt for opt in options if opt is not None]
 
         if len(options) < 2:
-            print(f"[QUIZ] SKIP: Pas assez d'options valides ({len(options)})")
+            logger.debug("[QUIZ] SKIP: Pas assez d'options valides (%s)", len(options))
             return None
 
         # Générer le texte de la question
-        question_text = self._format_question(context, hand)
+        question_text = formatter(hand) if formatter else self._format_question(context, hand)
 
-        print(f"[QUIZ] Options générées : {options}")
-        print(f"[QUIZ] 📝 Question texte: '{question_text}'")
-        print(f"[QUIZ] ✅ Question finale - Main: {hand}, Réponse: {correct_answer}, Options: {options}\n")
+        logger.debug("[QUIZ] Options générées : %s", options)
+        logger.debug("[QUIZ] 📝 Question texte: '%s'", question_text)
+        logger.debug("[QUIZ] ✅ Question finale - Main: %s, Réponse: %s, Options: %s", hand, correct_answer, options)
 
         return {
             'type': 'simple',
@@ -313,6 +515,41 @@ class QuizGenerator:
             'context_info': context
         }
 
+    def _in_range_answer(
+            self,
+            hand: str,
+            normalized_action: str,
+            ranges: List[Dict],
+            answer_cache: Optional[Dict[str, Optional[str]]] = None
+    ) -> Optional[str]:
+        """
+        Bonne réponse (affichée) pour une main IN de la range principale.
+        Ne dépend que de la main et des ranges du contexte : mémoïsée par main
+        dans answer_cache, qui vit avec le bundle chargé (voir load_contexts).
+
+        Returns:
+            Action pour l'UI, ou None si main DEFENSE sans action dans les sous-ranges
+        """
+        if answer_cache is not None and hand in answer_cache:
+            return answer_cache[hand]
+
+        # Si c'est un contexte DEFENSE, trouver l'action dans les sous-ranges
+        if normalized_action == 'DEFENSE':
+            correct_answer = self._find_subrange_action(hand, ranges)
+
+            # 🎯 CONVERSION CONTEXTUELLE : 3BET → RAISE pour l'affichage en DEFENSE
+            if correct_answer == '3BET':
+                correct_answer = 'RAISE'
+        elif normalized_action == 'OPEN':
+            # 🆕 CONVERSION : OPEN → RAISE pour l'UI
+            correct_answer = 'RAISE'
+        else:
+            correct_answer = normalized_action
+
+        if answer_cache is not None:
+            answer_cache[hand] = correct_answer
+        return correct_answer
+
     def _find_subrange_action(self, hand: str, ranges: List[Dict]) -> Optional[str]:
         """
         Trouve l'action correcte pour une main dans les sous-ranges.
@@ -332,11 +569,11 @@ class QuizGenerator:
                 if label and label != 'None' and label != '':
                     normalized = normalize_action(label)
                     if normalized:
-                        print(
-                            f"  [SUBRANGE] {hand} trouvé dans '{r['name']}' (range_key={r['range_key']}, label={label}) → {normalized}")
+                        logger.debug("  [SUBRANGE] %s trouvé dans '%s' (range_key=%s, label=%s) → %s",
+                                     hand, r['name'], r['range_key'], label, normalized)
                         return normalized
 
-        print(f"  [SUBRANGE] ⚠️ {hand} pas trouvé dans sous-ranges")
+        logger.debug("  [SUBRANGE] ⚠️ %s pas trouvé dans sous-ranges", hand)
         return None
 
     def _generate_action_options(
@@ -362,73 +599,17 @@ class QuizGenerator:
         Returns:
             Liste des options triées
         """
-        options = []
-
-        # 1. Toujours inclure la bonne réponse
-        if correct_answer:
-            options.append(correct_answer)
-
-        # 2. 🎯 NE JAMAIS AJOUTER 'DEFENSE' ou 'OPEN' - ce ne sont pas des actions jouables
-        # Convertir OPEN → RAISE si nécessaire
-        if main_range_action and main_range_action not in options:
-            if main_range_action == 'DEFENSE':
-                pass  # Ne pas ajouter DEFENSE
-            elif main_range_action == 'OPEN':
-                if 'RAISE' not in options:
-                    options.append('RAISE')
-            else:
-                options.append(main_range_action)
-
-        # 3. FOLD si pas déjà présent
-        primary = context.get('primary_action', '').lower()
-        hero_position = context.get('hero_position', '')
+        # Les options ne dépendent que de ces 4 valeurs : résultat mémoïsé
+        return list(_action_options(
+            correct_answer,
+            main_range_action,
+            context.get('primary_action', '').lower(),
+            context.get('hero_position', '')
+        ))
 
-        # Si BB et action de check (pas de relance)
-        if hero_position == 'BB' and 'check' in primary:
-            if 'CHECK' not in options:
-                options.append('CHECK')
-        else:
-            # Sinon, toujours FOLD
-            if 'FOLD' not in options:
-                options.append('FOLD')
-
-        # 4. ✗ NE PAS utiliser les sous-ranges pour les questions simples
-
-        # 5. Si on a moins de 3 options, ajouter des distracteurs contextuels
-        if len(options) < 3:
-            distractors = self._get_contextual_distractors(primary)
-            for distractor in distractors:
-                if distractor not in options:
-                    options.append(distractor)
-                    if len(options) >= 3:  # S'arrêter à 3 options
-                        break
-
-        # Trier dans un ordre fixe
-        return sort_actions(options)
     def _get_contextual_distractors(self, primary_action: str) -> List[str]:
-        """
-        Retourne des distracteurs pertinents selon le contexte.
-
-        Args:
-            primary_action: Action principale du contexte
-
-        Returns:
-            Liste de distracteurs (max 2 pour avoir 3 options total)
-        """
-        if 'defense' in primary_action:
-            return ['CALL', 'RAISE']  # 🎯 Actions vs open (RAISE au lieu de 3BET pour l'UI)
-        elif 'open' in primary_action:
-            return ['CALL']  # limp comme alternative (RAISE = redondant avec OPEN)
-        elif 'squeeze' in primary_action:
-            return ['CALL']  # overcall comme alternative
-        elif 'vs_limpers' in primary_action or 'iso' in primary_action:
-            return ['CALL', 'ISO']  # overcall ou iso
-        elif 'check' in primary_action:
-            return ['RAISE']  # raise si checké vers nous
-        elif '3bet' in primary_action:
-            return ['CALL']  # call le 3bet
-        else:
-            return ['CALL']  # générique
+        """Retourne des distracteurs pertinents selon le contexte (voir _contextual_distractors)"""
+        return _contextual_distractors(primary_action)
 
     # FONCTIONS HELPER POUR POSITIONS DYNAMIQUES
 
@@ -445,14 +626,14 @@ class QuizGenerator:
         # Option 1 : Opener spécifique dans action_sequence (RÉEL)
         if action_seq and action_seq.get('opener'):
             opener = action_seq['opener']
-            print(f"  ✅ Opener RÉEL depuis action_sequence: {opener}")
+            logger.debug("  ✅ Opener RÉEL depuis action_sequence: %s", opener)
             return opener
 
         # Option 2 : Range générique → choisir aléatoirement (INVENTÉ)
         positions = self._get_positions(table_format)
 
         if hero_pos not in positions:
-            print(f"  ⚠️ Hero position invalide, opener par défaut: UTG")
+            logger.debug("  ⚠️ Hero position invalide, opener par défaut: UTG")
             return "UTG"  # Fallback
 
         hero_idx = positions.index(hero_pos)
@@ -462,10 +643,10 @@ class QuizGenerator:
 
         if valid_openers:
             opener = random.choice(valid_openers)
-            print(f"  🎲 Opener INVENTÉ logiquement: {opener} (parmi {valid_openers})")
+            logger.debug("  🎲 Opener INVENTÉ logiquement: %s (parmi %s)", opener, valid_openers)
             return opener
 
-        print(f"  ⚠️ Pas de positions avant hero, fallback: UTG")
+        logger.debug("  ⚠️ Pas de positions avant hero, fallback: UTG")
         return "UTG"  # Fallback
 
     def _get_squeeze_scenario(self, hero_pos: str, table_format: str, action_seq: Dict) -> tuple:
@@ -484,17 +665,17 @@ class QuizGenerator:
         # OPENER
         if action_seq and action_seq.get('opener'):
             opener = action_seq['opener']
-            print(f"  ✅ Squeeze opener RÉEL: {opener}")
+            logger.debug("  ✅ Squeeze opener RÉEL: %s", opener)
         else:
             # Choisir un opener au moins 2 positions avant héros
             valid_openers = positions[:max(0, hero_idx - 2)]
             opener = random.choice(valid_openers) if valid_openers else "UTG"
-            print(f"  🎲 Squeeze opener INVENTÉ: {opener}")
+            logger.debug("  🎲 Squeeze opener INVENTÉ: %s", opener)
 
         # CALLERS
         if action_seq and action_seq.get('callers'):
             callers = action_seq['callers']
-            print(f"  ✅ Callers RÉELS: {callers}")
+            logger.debug("  ✅ Callers RÉELS: %s", callers)
             if len(callers) == 1:
                 callers_text = f"{callers[0]} call"
             else:
@@ -502,7 +683,7 @@ class QuizGenerator:
         elif action_seq and action_seq.get('callers_count'):
             count = action_seq['callers_count']
             callers_text = f"{count} joueur(s) callent"
-            print(f"  ✅ Nombre de callers RÉEL: {count}")
+            logger.debug("  ✅ Nombre de callers RÉEL: %s", count)
         else:
             # Générique : 1 caller aléatoire entre opener et héros
             if opener in positions:
@@ -511,13 +692,13 @@ class QuizGenerator:
                 if valid_callers:
                     caller = random.choice(valid_callers)
                     callers_text = f"{caller} call"
-                    print(f"  🎲 Caller INVENTÉ: {caller}")
+                    logger.debug("  🎲 Caller INVENTÉ: %s", caller)
                 else:
                     callers_text = "un joueur call"
-                    print(f"  🎲 Caller GÉNÉRIQUE (pas de positions entre opener et hero)")
+                    logger.debug("  🎲 Caller GÉNÉRIQUE (pas de positions entre opener et hero)")
             else:
                 callers_text = "un joueur call"
-                print(f"  🎲 Caller GÉNÉRIQUE (opener invalide)")
+                logger.debug("  🎲 Caller GÉNÉRIQUE (opener invalide)")
 
         return opener, callers_text
 
@@ -536,7 +717,7 @@ class QuizGenerator:
 
         if action_seq and action_seq.get('limpers'):
             limpers = action_seq['limpers']
-            print(f"  ✅ Limpers RÉELS: {limpers}")
+            logger.debug("  ✅ Limpers RÉELS: %s", limpers)
             if len(limpers) == 1:
                 return f"{limpers[0]} limp"
             else:
@@ -544,7 +725,7 @@ class QuizGenerator:
 
         elif action_seq and action_seq.get('limpers_count'):
             count = action_seq['limpers_count']
-            print(f"  ✅ Nombre de limpers RÉEL: {count}")
+            logger.debug("  ✅ Nombre de limpers RÉEL: %s", count)
             return f"{count} joueur(s) limpent"
 
         else:
@@ -553,7 +734,7 @@ class QuizGenerator:
             num_limpers = random.randint(1, min(2, len(valid_limpers)))
             limpers = random.sample(valid_limpers, num_limpers)
 
-            print(f"  🎲 Limpers INVENTÉS: {limpers}")
+            logger.debug("  🎲 Limpers INVENTÉS: %s", limpers)
 
             if len(limpers) == 1:
                 return f"{limpers[0]} limp"
@@ -573,6 +754,13 @@ class QuizGenerator:
         Returns:
             Texte de la question formaté
         """
+        parts = self._question_scenario_parts(context)
+
+        # Ajouter la main et la question
+        return ". ".join(parts) + f". Vous avez {hand}. Que faites-vous ?"
+
+    def _question_scenario_parts(self, context: Dict) -> List[str]:
+        """Début de la question (table, position, actions avant le héros), sans la main"""
         table = context.get('table_format', '6max')
         position = context.get('hero_position', 'BTN')
         stack = context.get('stack_depth', '100bb')
@@ -605,10 +793,25 @@ class QuizGenerator:
         elif primary_action == 'check':
             parts.append("Personne n'a ouvert")
 
-        # Ajouter la main et la question
-        question = ". ".join(parts) + f". Vous avez {hand}. Que faites-vous ?"
+        return parts
+
+    def _bundle_formatter(self, bundle: Dict) -> Callable[[str], str]:
+        """
+        Formateur de question spécialisé pour un contexte chargé, construit au
+        premier besoin puis conservé dans le bundle.
 
-        return question
+        Pour open/check/autres, le scénario est fixe : le début de phrase est
+        calculé une fois et seule la main varie. Defense/squeeze/vs_limpers
+        tirent opener/callers/limpers à chaque question : pas de spécialisation.
+        """
+        if 'formatter' not in bundle:
+            context = bundle['context']
+            if context.get('primary_action', '').lower() in _RANDOM_SCENARIO_ACTIONS:
+                bundle['formatter'] = partial(self._format_question, context)
+            else:
+                head = ". ".join(self._question_scenario_parts(context)) + ". Vous avez "
+                bundle['formatter'] = lambda hand: f"{head}{hand}. Que faites-vous ?"
+        return bundle['formatter']
 
 
 # Fonction utilitaire pour app.py
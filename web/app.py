@@ -1,52 +1,130 @@
-from flask import Flask, render_template, jsonify, request, send_from_directory, session
+from flask import Flask, Response, g, render_template, jsonify, request, send_from_directory, session, stream_template, stream_with_context
 import subprocess
+import hashlib
 import os
 import sys
 import sqlite3
+import threading
 import json
+import logging
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 import re
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache, wraps
 import random
+import time
+import traceback
+
+# orjson est optionnel : parsing JSON plus rapide si disponible
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Flask-Compress est optionnel : compression gzip/br des réponses JSON et HTML
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+logger = logging.getLogger(__name__)
+
+# Chemins du projet, calculés une fois à l'import
+PROJECT_ROOT = Path(__file__).parent.parent
+DB_PATH = PROJECT_ROOT / "data" / "poker_trainer.db"
 
 CARDS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'cartes')
 
 # Ajouter le chemin vers les modules
-sys.path.insert(0, str(Path(__file__).parent.parent / 'modules'))
+sys.path.insert(0, str(PROJECT_ROOT / 'modules'))
 
 # Imports des modules refactorisés
 from quiz_generator import QuizGenerator
-from poker_constants import ALL_POKER_HANDS
+from poker_constants import ALL_POKER_HANDS, AVAILABLE_LABELS
+from hand_selector import invalidate_context_borderlines
 from conflict_detector import detect_context_conflicts
 from quiz_history_manager import QuizHistoryManager  # 🆕 v4.5 - Historique des quiz
 
+# Pipeline d'import exécuté dans le process si possible (sinon integrated_pipeline.py)
+try:
+    from pipeline_runner import IntegratedPipeline
+except ImportError as e:
+    print(f"✗ pipeline_runner non disponible, import via sous-processus: {e}")
+    IntegratedPipeline = None
+
 # Importer context_validator si disponible
 try:
     from context_validator import ContextValidator
 
-    # Chemin absolu vers la base de données
-    db_path = Path(__file__).parent.parent / "data" / "poker_trainer.db"
-    validator = ContextValidator(str(db_path))
+    validator = ContextValidator(str(DB_PATH))
 
     VALIDATOR_AVAILABLE = True
     print(f"✓ Context validator chargé - VALIDATOR_AVAILABLE = {VALIDATOR_AVAILABLE}")
-    print(f"✓ Base de données: {db_path}")
-    print(f"✓ Base existe: {db_path.exists()}")
+    print(f"✓ Base de données: {DB_PATH}")
+    print(f"✓ Base existe: {DB_PATH.exists()}")
 except (ImportError, FileNotFoundError) as e:
     print(f"✗ ATTENTION: context_validator non disponible: {e}")
     VALIDATOR_AVAILABLE = False
 except Exception as e:
     print(f"✗ ERREUR inattendue lors du chargement validator: {e}")
-    import traceback
-
     traceback.print_exc()
     VALIDATOR_AVAILABLE = False
 
 app = Flask(__name__)
 app.secret_key = 'poker_training_secret_key_2025'  # 🆕 v4.5 - Pour les sessions Flask
 
+
+def log_exception(message, *args):
+    """Journalise une erreur avec sa traceback (écrite hors du thread de requête par le QueueListener)"""
+    logger.exception(message, *args)
+
+
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+
+    class OrjsonProvider(DefaultJSONProvider):
+        """Provider JSON Flask utilisant orjson (parsing des requêtes et jsonify)"""
+
+        def _orjson_options(self):
+            # Dates laissées au default de Flask (format HTTP) pour garder les mêmes réponses
+            options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if self.sort_keys:
+                options |= orjson.OPT_SORT_KEYS
+            return options
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # Corps en bytes directement, sans aller-retour str → utf-8
+            obj = self._prepare_response_obj(args, kwargs)
+            payload = orjson.dumps(obj, default=self.default, option=self._orjson_options())
+            return self._app.response_class(payload + b"\n", mimetype=self.mimetype)
+
+    # request.get_json() passe par app.json.loads, jsonify() par app.json.response
+    app.json = OrjsonProvider(app)
+
+# Réponses lues par le front uniquement : ni tri des clés ni indentation (même en debug)
+app.json.sort_keys = False
+app.json.compact = True
+
+# Quiz et résultats d'import : JSON très redondant (clés répétées), bien compressible.
+# text/event-stream exclu : les événements SSE ne doivent pas être mis en tampon
+if Compress is not None:
+    app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+    app.config['COMPRESS_LEVEL'] = 4  # gzip rapide
+    Compress(app)
+
 # 🆕 v4.5 - Gestionnaire d'historique des quiz (base séparée)
-history_db_path = Path(__file__).parent.parent / "data" / "quiz_history.db"
+history_db_path = PROJECT_ROOT / "data" / "quiz_history.db"
 try:
     history_manager = QuizHistoryManager(str(history_db_path))
     print(f"✓ QuizHistoryManager initialisé: {history_db_path}")
@@ -62,6 +140,69 @@ ORPHAN_COUNT = 0
 # UTILITAIRES
 # ============================================
 
+# Vue figée (hashable) de action_sequence, décodée une seule fois par appel
+ActionSeq = namedtuple('ActionSeq', 'opener callers limpers limpers_count')
+
+
+def _title_defense(seq):
+    return f'Défense vs {seq.opener} open' if seq.opener else 'Défense'
+
+
+def _title_squeeze(seq):
+    if seq.opener and seq.callers:
+        return f"Squeeze vs {seq.opener} open + {' + '.join(seq.callers)} call"
+    if seq.opener:
+        return f'Squeeze vs {seq.opener} open'
+    return 'Squeeze'
+
+
+def _title_vs_limpers(seq):
+    if seq.limpers_count:
+        return f'Vs {seq.limpers_count} limper(s)'
+    if seq.limpers:
+        return f"Vs {' + '.join(seq.limpers)} limp"
+    return 'Vs limpers'
+
+
+def _slug_defense(seq):
+    return f'defense-vs-{seq.opener}' if seq.opener else 'defense'
+
+
+def _slug_squeeze(seq):
+    positions = (seq.opener,) + seq.callers if seq.opener else seq.callers
+    positions = [p for p in positions if p]
+    if positions:
+        return f'squeeze-{"-".join(positions)}'
+    return 'squeeze'
+
+
+def _slug_vs_limpers(seq):
+    if seq.limpers_count:
+        return f'vs-{seq.limpers_count}limpers'
+    if seq.limpers:
+        return f'vs-limpers-{"-".join(seq.limpers)}'
+    return 'vs-limpers'
+
+
+# Caractères retirés du slug
+_SLUG_STRIP = str.maketrans('', '', ' +')
+
+# primary_action → construction du libellé (titre humain) et de la clé (slug)
+_TITLE_BUILDERS = {
+    'open': lambda seq: 'Open',
+    'defense': _title_defense,
+    'squeeze': _title_squeeze,
+    'vs_limpers': _title_vs_limpers,
+}
+
+_SLUG_BUILDERS = {
+    'open': lambda seq: 'open',
+    'defense': _slug_defense,
+    'squeeze': _slug_squeeze,
+    'vs_limpers': _slug_vs_limpers,
+}
+
+
 def generate_human_title_and_slug(table_format, hero_position, primary_action, action_sequence, stack_depth):
     """
     Génère le titre humain et le slug pour un contexte
@@ -76,234 +217,588 @@ def generate_human_title_and_slug(table_format, hero_position, primary_action, a
     Returns:
         tuple: (human_title, slug)
     """
+    seq_dict = action_sequence or {}
+    seq = ActionSeq(
+        seq_dict.get('opener'),
+        tuple(seq_dict.get('callers') or ()),
+        tuple(seq_dict.get('limpers') or ()),
+        seq_dict.get('limpers_count')
+    )
+    return _human_title_and_slug(table_format, hero_position, primary_action, seq, stack_depth)
+
+
+@lru_cache(maxsize=1024)
+def _human_title_and_slug(table_format, hero_position, primary_action, seq, stack_depth):
+    """Titre et slug d'une combinaison (les mêmes reviennent d'un affichage à l'autre)"""
     # HUMAN TITLE
-    if primary_action == 'open':
-        action_text = 'Open'
-    elif primary_action == 'defense':
-        if action_sequence and action_sequence.get('opener'):
-            opener = action_sequence['opener']
-            action_text = f'Défense vs {opener} open'
-        else:
-            action_text = 'Défense'
-    elif primary_action == 'squeeze':
-        opener = action_sequence.get('opener') if action_sequence else None
-        callers = action_sequence.get('callers', []) if action_sequence else []
-
-        if opener and callers:
-            callers_text = ' + '.join(callers)
-            action_text = f'Squeeze vs {opener} open + {callers_text} call'
-        elif opener:
-            action_text = f'Squeeze vs {opener} open'
-        else:
-            action_text = 'Squeeze'
-    elif primary_action == 'vs_limpers':
-        limpers_count = action_sequence.get('limpers_count') if action_sequence else None
-        limpers = action_sequence.get('limpers', []) if action_sequence else []
-
-        if limpers_count:
-            action_text = f'Vs {limpers_count} limper(s)'
-        elif limpers:
-            limpers_text = ' + '.join(limpers)
-            action_text = f'Vs {limpers_text} limp'
-        else:
-            action_text = 'Vs limpers'
-    else:
-        action_text = primary_action.capitalize()
+    title_builder = _TITLE_BUILDERS.get(primary_action)
+    action_text = title_builder(seq) if title_builder else primary_action.capitalize()
 
     human_title = f"{table_format} · {hero_position} · {action_text} · {stack_depth}"
 
     # SLUG
-    if primary_action == 'open':
-        ctx_key = 'open'
-    elif primary_action == 'defense':
-        opener = action_sequence.get('opener') if action_sequence else None
-        if opener:
-            ctx_key = f'defense-vs-{opener.lower()}'
-        else:
-            ctx_key = 'defense'
-    elif primary_action == 'squeeze':
-        opener = action_sequence.get('opener') if action_sequence else None
-        callers = action_sequence.get('callers', []) if action_sequence else []
+    slug_builder = _SLUG_BUILDERS.get(primary_action)
+    ctx_key = slug_builder(seq) if slug_builder else primary_action.replace(' ', '-')
 
-        positions = [opener] + callers if opener else callers
-        positions = [p for p in positions if p]
+    # Minuscules et nettoyage (espaces, '+') en une passe chacun sur le slug complet
+    slug = f"nlhe-{table_format}-{hero_position}-{ctx_key}-{stack_depth}".lower().translate(_SLUG_STRIP)
 
-        if positions:
-            ctx_key = f'squeeze-{"-".join([p.lower() for p in positions])}'
-        else:
-            ctx_key = 'squeeze'
-    elif primary_action == 'vs_limpers':
-        limpers_count = action_sequence.get('limpers_count') if action_sequence else None
-        limpers = action_sequence.get('limpers', []) if action_sequence else []
-
-        if limpers_count:
-            ctx_key = f'vs-{limpers_count}limpers'
-        elif limpers:
-            ctx_key = f'vs-limpers-{"-".join([l.lower() for l in limpers])}'
-        else:
-            ctx_key = 'vs-limpers'
-    else:
-        ctx_key = primary_action.replace(' ', '-').lower()
+    return human_title, slug
 
-    slug = f"nlhe-{table_format.lower()}-{hero_position.lower()}-{ctx_key}-{stack_depth.lower()}"
-    slug = slug.replace(' ', '').replace('+', '')  # Nettoyer
 
-    return human_title, slug
+# Pool de connexions SQLite réutilisées d'une requête à l'autre
+DB_POOL_SIZE = 8
+_db_pool = []
+_db_pool_lock = threading.Lock()
+_db_indexes_checked = False
+
+# Index nécessaires aux agrégations du dashboard et du quiz (déjà créés par le
+# pipeline d'import, vérifiés ici pour les bases plus anciennes)
+APP_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_ranges_context_id ON ranges(context_id)",
+    "CREATE INDEX IF NOT EXISTS idx_range_hands_range_id ON range_hands(range_id)",
+    # ORDER BY needs_validation DESC, quiz_ready DESC, id DESC servi sans tri
+    "CREATE INDEX IF NOT EXISTS idx_ctx_dashboard ON range_contexts(needs_validation DESC, quiz_ready DESC, id DESC)",
+    # Statistiques de validation par niveau de confiance (index couvrant)
+    "CREATE INDEX IF NOT EXISTS idx_ctx_needs_conf ON range_contexts(needs_validation, confidence_score)",
+    # Chargement des ranges du quiz (filtre par contexte, tri par range_key)
+    "CREATE INDEX IF NOT EXISTS idx_ranges_ctx ON ranges(context_id, range_key)",
+    # GROUP_CONCAT des mains servi par un index couvrant
+    "CREATE INDEX IF NOT EXISTS idx_rh_rid ON range_hands(range_id, hand)",
+    # Index partiel : seuls les contextes en erreur (rares) y figurent
+    "CREATE INDEX IF NOT EXISTS idx_ctx_errors ON range_contexts(id) WHERE error_message IS NOT NULL",
+)
+
+# Réglages appliqués à chaque nouvelle connexion du pool :
+# WAL laisse les lectures du dashboard tourner pendant un import, NORMAL évite un fsync par commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connexion SQLite recyclée : close() la rend au pool au lieu de la fermer"""
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        with _db_pool_lock:
+            if len(_db_pool) < DB_POOL_SIZE and self not in _db_pool:
+                _db_pool.append(self)
+                return
+        super().close()
 
 
 def get_db_connection():
-    """Retourne une connexion à la base de données"""
-    db_path = Path(__file__).parent.parent / "data" / "poker_trainer.db"
-    if not db_path.exists():
+    """Retourne une connexion à la base de données (depuis le pool si possible)"""
+    with _db_pool_lock:
+        if _db_pool:
+            return _db_pool.pop()
+
+    if not DB_PATH.exists():
         return None
-    return sqlite3.connect(db_path)
+    # check_same_thread=False : une connexion du pool peut servir un autre thread,
+    # jamais deux à la fois (elle n'est rendue au pool qu'au close()).
+    # Les requêtes préparées restent en cache tant que la connexion vit dans le pool.
+    conn = sqlite3.connect(DB_PATH, factory=PooledConnection, check_same_thread=False,
+                           cached_statements=256)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    _ensure_app_indexes(conn)
+    return conn
+
+
+def _ensure_app_indexes(conn):
+    """Crée les index de l'application une seule fois par processus"""
+    global _db_indexes_checked
+    if _db_indexes_checked:
+        return
+    try:
+        for statement in APP_INDEXES:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # Tables absentes (base vide) : on réessaiera à la prochaine connexion
+        logger.debug("Index non créés: %s", e)
+        return
+    _db_indexes_checked = True
 
 
-def check_orphans_on_startup():
-    """Vérifie les orphelins au démarrage."""
+def db():
+    """
+    Connexion de la requête courante, partagée par tous les helpers appelés
+    pendant la requête et rendue au pool en fin de contexte applicatif.
+    """
+    if g.get('db') is None:
+        g.db = get_db_connection()
+        if g.db is not None and app.debug:
+            g.db.set_trace_callback(_count_query)
+    return g.db
+
+
+@app.teardown_appcontext
+def close_request_db(exc):
+    conn = g.pop('db', None)
+    if conn is not None:
+        if app.debug:
+            conn.set_trace_callback(None)
+        conn.close()
+
+
+# ============================================
+# DÉTECTION N+1 (mode debug uniquement)
+# ============================================
+
+# Nombre max de requêtes SQL par endpoint (connexion de requête db() uniquement)
+QUERY_BUDGETS = {
+    'api_dashboard_contexts': 2,
+    'api_dashboard_stats': 2,
+    'get_validation_stats': 3,
+    'get_validation_context': 2,
+    'api_quiz_check': 1,
+    'api_debug_db': 6,
+}
+
+
+def _count_query(statement):
+    g.query_count = g.get('query_count', 0) + 1
+
+
+@app.after_request
+def check_query_budget(response):
+    """En debug, fait échouer les réponses qui dépassent leur budget de requêtes"""
+    if not app.debug:
+        return response
+
+    budget = QUERY_BUDGETS.get(request.endpoint)
+    count = g.get('query_count', 0)
+    if budget is not None and count > budget:
+        logger.error("N+1 détecté sur %s : %d requêtes (budget %d)", request.endpoint, count, budget)
+        # after_request doit renvoyer un objet Response (pas de tuple)
+        response = jsonify({
+            'error': f'Budget de requêtes dépassé pour {request.endpoint}',
+            'queries': count,
+            'budget': budget
+        })
+        response.status_code = 500
+    return response
+
+
+def ttl_cache(seconds):
+    """
+    Décorateur de cache en mémoire avec durée de vie (par arguments positionnels).
+
+    La fonction décorée expose cache_clear() pour une invalidation explicite.
+    """
+
+    def decorator(func):
+        entries = {}
+
+        @wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            entry = entries.get(args)
+            if entry is not None and now - entry[0] < seconds:
+                return entry[1]
+            value = func(*args)
+            entries[args] = (now, value)
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator
+
+
+def _loads(raw):
+    """Désérialise du JSON (str ou bytes) avec orjson si disponible"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def read_json_file(path):
+    """Charge un fichier JSON (orjson si disponible), lu en binaire en un seul bloc"""
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+
+def write_json_file(path, data, pretty=True):
+    """
+    Écrit un fichier JSON (UTF-8) en une seule écriture binaire, de façon atomique :
+    fichier temporaire dans le même dossier puis os.replace (jamais de JSON tronqué).
+
+    pretty=True : indenté sur 2 espaces (fichiers relus ou édités à la main) ;
+    pretty=False : compact, pour les fichiers régénérés par la machine.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        payload = orjson.dumps(data, option=option)
+    elif pretty:
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    else:
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
     try:
-        conn = get_db_connection()
-        if not conn:
-            return 0
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
-        cursor = conn.cursor()
-        project_root = Path(__file__).parent.parent
 
-        cursor.execute("""
-            SELECT COUNT(DISTINCT rc.id)
-            FROM range_contexts rc
-            JOIN range_files rf ON rc.file_id = rf.id
-        """)
+def _dumps_bytes(obj):
+    """Sérialise un objet JSON en bytes (orjson si disponible)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
 
-        total = cursor.fetchone()[0]
-        if total == 0:
-            conn.close()
-            return 0
 
-        cursor.execute("SELECT rf.file_path FROM range_files rf")
+def stream_json_array(items, prefix=b'[', suffix=b']'):
+    """
+    Réponse JSON construite élément par élément : pas de liste complète
+    ni de chaîne intermédiaire en mémoire.
+
+    prefix/suffix permettent d'envelopper le tableau dans un objet.
+    """
+
+    def generate():
+        yield prefix
+        first = True
+        for item in items:
+            if first:
+                first = False
+                yield _dumps_bytes(item)
+            else:
+                yield b',' + _dumps_bytes(item)
+        yield suffix
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+@lru_cache(maxsize=8)
+def _table_info(table_name):
+    """Colonnes d'une table (PRAGMA table_info), mises en cache pour la durée du process.
+
+    Appeler _table_info.cache_clear() après une migration.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return ()
+    try:
+        return tuple(conn.execute(f"PRAGMA table_info({table_name})").fetchall())
+    finally:
+        conn.close()
+
+
+@ttl_cache(30)
+def _label_canon_distribution():
+    """Distribution des label_canon dans ranges (cache 30s)"""
+    conn = get_db_connection()
+    if not conn:
+        return []
+    try:
+        return conn.execute("""
+            SELECT label_canon, COUNT(*) as count
+            FROM ranges
+            WHERE label_canon IS NOT NULL
+            GROUP BY label_canon
+            ORDER BY count DESC
+        """).fetchall()
+    finally:
+        conn.close()
+
+
+@lru_cache(maxsize=None)
+def _rendered_static_page(name):
+    """
+    HTML d'un template sans variable, rendu une seule fois pour la durée du process.
+
+    Returns:
+        (body en bytes, ETag = empreinte du contenu)
+    """
+    body = render_template(name).encode('utf-8')
+    return body, hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def render_static_page(name):
+    """
+    Réponse HTML d'une page statique (template sans contexte).
+    Le rendu est mis en cache et servi avec un ETag : le navigateur revalide
+    et reçoit un 304 sans corps tant que la page n'a pas changé.
+    Sauf si les templates sont rechargés à chaud (mode debug) : rendu à chaque appel.
+    """
+    if app.jinja_env.auto_reload:
+        return render_template(name)
+    body, etag = _rendered_static_page(name)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return with_etag(Response(body, mimetype='text/html'), etag)
+
+
+# ============================================
+# REQUÊTES DES ORPHELINS ET DES JSON SOURCES
+# Texte constant d'un appel à l'autre : réutilisé par le cache de requêtes
+# préparées de chaque connexion du pool (cached_statements=256)
+# ============================================
+
+# Fichiers JSON référencés par au moins un contexte
+SQL_REFERENCED_FILE_PATHS = """
+    SELECT DISTINCT rf.file_path
+    FROM range_files rf
+    JOIN range_contexts rc ON rc.file_id = rf.id
+    WHERE rf.file_path IS NOT NULL
+"""
+
+# Contextes dont le fichier est manquant ({placeholders} = '?,?,...'), avec comptages
+# (sous-requêtes indexées sur ranges.context_id / range_hands.range_id,
+# pas de produit ranges × mains à dédoublonner)
+SQL_ORPHANS = """
+    SELECT
+        rc.id,
+        rc.original_name,
+        rc.display_name,
+        rf.filename,
+        rf.file_path,
+        rf.id as file_id,
+        (SELECT COUNT(*) FROM ranges r WHERE r.context_id = rc.id) as ranges_count,
+        (SELECT COUNT(*) FROM range_hands rh
+         JOIN ranges r ON rh.range_id = r.id
+         WHERE r.context_id = rc.id) as hands_count
+    FROM range_contexts rc
+    JOIN range_files rf ON rc.file_id = rf.id
+    WHERE rf.file_path IN ({placeholders})
+"""
+
+SQL_REBUILD_CONTEXT = """
+    SELECT
+        rc.original_name, rc.table_format, rc.hero_position,
+        rc.vs_position, rc.primary_action, rc.game_type,
+        rc.variant, rc.stack_depth, rc.stakes, rc.sizing,
+        rf.file_path
+    FROM range_contexts rc
+    JOIN range_files rf ON rc.file_id = rf.id
+    WHERE rc.id = ?
+"""
+
+# Tri servi par l'index idx_ranges_context_key_int, conversion faite par SQLite
+SQL_REBUILD_RANGES = """
+    SELECT range_key, name, color, label_canon, CAST(range_key AS INTEGER)
+    FROM ranges
+    WHERE context_id = ?
+    ORDER BY CAST(range_key AS INTEGER)
+"""
+
+SQL_REBUILD_HANDS = """
+    SELECT rh.hand, CAST(r.range_key AS INTEGER)
+    FROM range_hands rh
+    JOIN ranges r ON rh.range_id = r.id
+    WHERE r.context_id = ?
+    ORDER BY rh.hand
+"""
+
+# Chemin du JSON source d'un contexte et correspondance ID DB → range_key
+SQL_SOURCE_JSON_RANGES = """
+    SELECT rf.file_path, r.id, r.range_key
+    FROM range_contexts rc
+    JOIN range_files rf ON rc.file_id = rf.id
+    LEFT JOIN ranges r ON r.context_id = rc.id
+    WHERE rc.id = ?
+"""
+
+
+@ttl_cache(5)
+def get_missing_file_paths():
+    """
+    Retourne l'ensemble des file_path (relatifs) dont le fichier JSON est absent,
+    parmi les fichiers référencés par au moins un contexte.
 
-        orphan_count = 0
-        for (file_path,) in cursor.fetchall():
-            full_path = project_root / file_path
-            if not full_path.exists():
-                orphan_count += 1
+    Résultat mis en cache 5s ; les routes qui créent, suppriment ou renomment
+    des fichiers l'invalident via get_missing_file_paths.cache_clear().
+    """
+    conn = get_db_connection()
+    if not conn:
+        return frozenset()
 
+    try:
+        rows = conn.execute(SQL_REFERENCED_FILE_PATHS).fetchall()
+    finally:
         conn.close()
 
+    # Un seul os.scandir par dossier parent au lieu d'un stat() par fichier
+    by_dir = defaultdict(list)
+    for (file_path,) in rows:
+        full_path = PROJECT_ROOT / file_path
+        by_dir[full_path.parent].append((full_path.name, file_path))
+
+    missing = set()
+    for directory, entries in by_dir.items():
+        existing = _dir_file_names(directory)
+        missing.update(file_path for name, file_path in entries if name not in existing)
+
+    return frozenset(missing)
+
+
+# Listings de dossiers matérialisés : {dossier: (st_mtime_ns, noms des fichiers)}
+_DIR_LISTINGS = {}
+
+
+def _dir_file_names(directory):
+    """
+    Noms des fichiers d'un dossier (ensemble vide s'il n'existe pas).
+
+    La mtime d'un dossier change à chaque création, suppression ou renommage
+    d'une entrée : tant qu'elle est identique, le listing mémorisé est servi
+    avec un seul stat() du dossier, sans le relire.
+    """
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        _DIR_LISTINGS.pop(directory, None)
+        return frozenset()
+
+    cached = _DIR_LISTINGS.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with os.scandir(directory) as it:
+            names = frozenset(entry.name for entry in it if entry.is_file())
+    except OSError:
+        return frozenset()
+    _DIR_LISTINGS[directory] = (mtime, names)
+    return names
+
+
+def check_orphans_on_startup():
+    """Vérifie les orphelins au démarrage."""
+    try:
+        # Une seule requête : les fichiers référencés par un contexte (aucun → 0)
+        orphan_count = len(get_missing_file_paths())
+
         if orphan_count > 0:
-            print(f"⚠️  {orphan_count} fichier(s) JSON manquant(s) détectés")
-            print(f"   → Accédez à http://localhost:5000/orphans pour les gérer")
+            logger.warning("⚠️  %d fichier(s) JSON manquant(s) détectés", orphan_count)
+            logger.warning("   → Accédez à http://localhost:5000/orphans pour les gérer")
 
         return orphan_count
 
     except Exception as e:
-        print(f"[ORPHANS] Erreur check: {e}")
+        logger.error("[ORPHANS] Erreur check: %s", e)
         return 0
 
 
+# Métadonnées de contexte recopiées dans le JSON source
+SOURCE_METADATA_KEYS = (
+    'table_format', 'hero_position', 'vs_position', 'primary_action', 'game_type',
+    'variant', 'stack_depth', 'stakes', 'sizing'
+)
+
+# Mapping label_canon → nom pour l'éditeur
+LABEL_TO_NAME = {
+    "OPEN": "open",
+    "CALL": "call",
+    "R3_VALUE": "3bet_value",
+    "R3_BLUFF": "3bet_bluff",
+    "R4_VALUE": "4bet_value",
+    "R4_BLUFF": "4bet_bluff",
+    "R5_ALLIN": "5bet_allin",
+    "ISO_VALUE": "iso_value",
+    "ISO_BLUFF": "iso_bluff",
+    "CHECK": "check",
+    "FOLD": "fold",
+    "RAISE": "raise",
+    "UNKNOWN": "unknown"
+}
+
+
 def update_source_json(context_id: int, metadata: dict, range_labels: dict = None):
     """
     Met à jour le fichier JSON source avec les métadonnées validées et les labels de sous-ranges.
     """
-    # Mapping label_canon → nom pour l'éditeur
-    LABEL_TO_NAME = {
-        "OPEN": "open",
-        "CALL": "call",
-        "R3_VALUE": "3bet_value",
-        "R3_BLUFF": "3bet_bluff",
-        "R4_VALUE": "4bet_value",
-        "R4_BLUFF": "4bet_bluff",
-        "R5_ALLIN": "5bet_allin",
-        "ISO_VALUE": "iso_value",
-        "ISO_BLUFF": "iso_bluff",
-        "CHECK": "check",
-        "FOLD": "fold",
-        "RAISE": "raise",
-        "UNKNOWN": "unknown"
-    }
 
     try:
-        print(f"[JSON] Début mise à jour JSON pour context_id={context_id}")
+        logger.debug("[JSON] Début mise à jour JSON pour context_id=%s", context_id)
 
         conn = get_db_connection()
         if not conn:
-            print("[JSON] ✗ Connexion DB impossible")
+            logger.error("[JSON] ✗ Connexion DB impossible")
             return False, "Connexion DB impossible"
 
-        cursor = conn.cursor()
-
-        # Récupérer le chemin du fichier JSON
-        cursor.execute("""
-            SELECT rf.file_path
-            FROM range_contexts rc
-            JOIN range_files rf ON rc.file_id = rf.id
-            WHERE rc.id = ?
-        """, (context_id,))
+        # Chemin du fichier JSON et correspondance ID DB → range_key en une
+        # seule requête ; la connexion est rendue avant toute E/S fichier
+        try:
+            rows = conn.execute(SQL_SOURCE_JSON_RANGES, (context_id,)).fetchall()
+        finally:
+            conn.close()
 
-        result = cursor.fetchone()
-        print(f"[JSON] Résultat requête DB: {result}")
+        logger.debug("[JSON] Résultat requête DB: %d ligne(s)", len(rows))
 
-        if not result or not result[0]:
-            conn.close()
-            print("[JSON] ✗ Fichier source non trouvé en DB")
+        if not rows or not rows[0][0]:
+            logger.error("[JSON] ✗ Fichier source non trouvé en DB")
             return False, "Fichier source non trouvé"
 
-        file_path_relative = result[0]
-        project_root = Path(__file__).parent.parent
-        file_path = project_root / file_path_relative
+        file_path_relative = rows[0][0]
+        range_id_to_key = {range_id: range_key for _, range_id, range_key in rows if range_id is not None}
+        file_path = PROJECT_ROOT / file_path_relative
 
-        print(f"[JSON] Chemin fichier: {file_path}")
-        print(f"[JSON] Fichier existe: {file_path.exists()}")
+        logger.debug("[JSON] Chemin fichier: %s", file_path)
 
         if not file_path.exists():
-            conn.close()
-            print(f"[JSON] ✗ Fichier introuvable: {file_path}")
+            logger.error("[JSON] ✗ Fichier introuvable: %s", file_path)
             return False, f"Fichier non trouvé: {file_path}"
 
         # Charger le JSON
-        print("[JSON] Chargement du fichier...")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        logger.debug("[JSON] Chargement du fichier...")
+        data = read_json_file(file_path)
+
+        # Seules les valeurs réellement modifiées lèvent le drapeau : pas de réécriture sinon
+        changed = False
 
-        print(f"[JSON] JSON chargé. Clés: {list(data.keys())}")
+        def assign(obj, key, value):
+            nonlocal changed
+            if key not in obj or obj[key] != value:
+                obj[key] = value
+                changed = True
+
+        logger.debug("[JSON] JSON chargé. Clés: %s", list(data))
 
         # Mettre à jour les métadonnées dans le JSON
         if 'metadata' not in data:
             data['metadata'] = {}
-
-        print("[JSON] Mise à jour des métadonnées...")
-        data['metadata'].update({
-            'table_format': metadata.get('table_format'),
-            'hero_position': metadata.get('hero_position'),
-            'vs_position': metadata.get('vs_position'),
-            'primary_action': metadata.get('primary_action'),
-            'game_type': metadata.get('game_type'),
-            'variant': metadata.get('variant'),
-            'stack_depth': metadata.get('stack_depth'),
-            'stakes': metadata.get('stakes'),
-            'sizing': metadata.get('sizing'),
-            'validated': True,
-            'validated_by_user': True
-        })
+            changed = True
+
+        # Seules les clés transmises sont écrites : une mise à jour partielle
+        # n'écrase plus les autres métadonnées avec None
+        logger.debug("[JSON] Mise à jour des métadonnées...")
+        json_metadata = data['metadata']
+        for key in SOURCE_METADATA_KEYS:
+            if key in metadata:
+                assign(json_metadata, key, metadata[key])
+        assign(json_metadata, 'validated', True)
+        assign(json_metadata, 'validated_by_user', True)
 
         # Mettre à jour les labels des ranges si fournis
         if range_labels:
-            print(f"[JSON] Mise à jour {len(range_labels)} labels de ranges...")
+            logger.debug("[JSON] Mise à jour %d labels de ranges...", len(range_labels))
 
             if 'data' in data and 'ranges' in data['data']:
                 ranges_dict = data['data']['ranges']
-                print(f"[JSON] Structure détectée: data.data.ranges avec {len(ranges_dict)} ranges")
-
-                # Créer une correspondance ID DB → range_key
-                range_id_to_key = {}
+                logger.debug("[JSON] Structure détectée: data.data.ranges avec %d ranges", len(ranges_dict))
 
-                for range_id in range_labels.keys():
-                    cursor.execute("SELECT range_key FROM ranges WHERE id = ?", (range_id,))
-                    result = cursor.fetchone()
-                    if result:
-                        range_id_to_key[range_id] = result[0]
-
-                print(f"[JSON] Correspondances ID→Key: {range_id_to_key}")
+                logger.debug("[JSON] Correspondances ID→Key: %s", range_id_to_key)
 
                 # Mettre à jour les labels dans le JSON
                 for range_id, label_canon in range_labels.items():
@@ -314,31 +809,34 @@ def update_source_json(context_id: int, metadata: dict, range_labels: dict = Non
                         old_name = range_obj.get('name', 'N/A')
 
                         # Mettre à jour le label_canon
-                        range_obj['label_canon'] = label_canon
+                        assign(range_obj, 'label_canon', label_canon)
 
                         # Mettre à jour aussi le nom pour l'éditeur
                         new_name = LABEL_TO_NAME.get(label_canon, label_canon.lower())
-                        range_obj['name'] = new_name
+                        assign(range_obj, 'name', new_name)
 
-                        print(
-                            f"[JSON]   Range {range_key}: name={old_name}→{new_name}, label={old_label}→{label_canon}")
+                        logger.debug("[JSON]   Range %s: name=%s→%s, label=%s→%s",
+                                     range_key, old_name, new_name, old_label, label_canon)
                     else:
-                        print(f"[JSON]   ⚠️ Range ID {range_id} (key={range_key}) non trouvée dans JSON")
+                        logger.warning("[JSON]   ⚠️ Range ID %s (key=%s) non trouvée dans JSON", range_id, range_key)
 
-        conn.close()
+        # Sauvegarder le JSON mis à jour (sauf s'il est identique au fichier chargé)
+        if not changed:
+            logger.info("[JSON] JSON inchangé, pas de réécriture")
+        else:
+            logger.debug("[JSON] Sauvegarde dans %s...", file_path)
+            write_json_file(file_path, data)
 
-        # Sauvegarder le JSON mis à jour
-        print(f"[JSON] Sauvegarde dans {file_path}...")
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Les ranges de ce contexte ont pu changer : oublier ses borderlines précalculées
+        # (le cache lru des borderlines est indexé par le contenu des ranges, rien à vider)
+        invalidate_context_borderlines(context_id)
+        get_missing_file_paths.cache_clear()
 
-        print("[JSON] ✅ JSON mis à jour avec succès")
+        logger.info("[JSON] ✅ JSON mis à jour avec succès")
         return True, "JSON mis à jour avec succès"
 
     except Exception as e:
-        print(f"[JSON] ✗ Erreur: {e}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[JSON] ✗ Erreur: %s", e)
         return False, f"Erreur mise à jour JSON: {str(e)}"
 
 
@@ -353,7 +851,7 @@ def cards_static(filename):
 @app.route('/')
 def dashboard():
     """Page principale du dashboard"""
-    return render_template('dashboard.html')
+    return render_static_page('dashboard.html')
 
 
 # ============================================
@@ -363,44 +861,36 @@ def dashboard():
 @app.route('/orphans')
 def orphans_page():
     """Page de gestion des contextes dont le fichier JSON est manquant."""
-    return render_template('orphans.html')
+    return render_static_page('orphans.html')
 
 
 @app.route('/api/orphans/check', methods=['GET'])
 def check_orphans():
     """Vérifie et retourne la liste des contextes orphelins."""
     try:
-        conn = get_db_connection()
+        # 1. Fichiers manquants (ensemble en mémoire) ; rien à agréger si aucun
+        missing_paths = get_missing_file_paths()
+        if not missing_paths:
+            return jsonify({'orphans': [], 'count': 0})
+
+        conn = db()
         if not conn:
             return jsonify({'orphans': [], 'count': 0})
 
         cursor = conn.cursor()
-        project_root = Path(__file__).parent.parent
 
-        cursor.execute("""
-            SELECT 
-                rc.id,
-                rc.original_name,
-                rc.display_name,
-                rf.filename,
-                rf.file_path,
-                rf.id as file_id,
-                COUNT(DISTINCT r.id) as ranges_count,
-                COUNT(DISTINCT rh.id) as hands_count
-            FROM range_contexts rc
-            JOIN range_files rf ON rc.file_id = rf.id
-            LEFT JOIN ranges r ON rc.id = r.context_id
-            LEFT JOIN range_hands rh ON r.id = rh.range_id
-            GROUP BY rc.id
-        """)
+        # 2. Comptages limités aux contextes dont le fichier est manquant (voir SQL_ORPHANS)
+        missing_list = list(missing_paths)
+        placeholders = ','.join('?' * len(missing_list))
+        cursor.execute(SQL_ORPHANS.format(placeholders=placeholders), missing_list)
 
-        orphans = []
-        for row in cursor.fetchall():
-            context_id, original_name, display_name, filename, file_path, file_id, ranges_count, hands_count = row
+        rows = cursor.fetchall()
 
-            full_path = project_root / file_path
-            if not full_path.exists():
-                orphans.append({
+        def orphans():
+            for row in rows:
+                context_id, original_name, display_name, filename, file_path, file_id, ranges_count, hands_count = row
+
+                yield {
                     'context_id': context_id,
                     'file_id': file_id,
                     'name': display_name or original_name or filename,
@@ -408,14 +898,14 @@ def check_orphans():
                     'file_path': file_path,
                     'ranges_count': ranges_count,
                     'hands_count': hands_count
-                })
-
-        conn.close()
+                }
 
-        return jsonify({
-            'orphans': orphans,
-            'count': len(orphans)
-        })
+        # Orphelins sérialisés un à un : ni liste de dicts ni corps complet en mémoire
+        return stream_json_array(
+            orphans(),
+            prefix=b'{"orphans":[',
+            suffix=b'],"count":' + _dumps_bytes(len(rows)) + b'}'
+        )
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -434,7 +924,7 @@ def ignore_orphan(context_id):
 def delete_orphan(context_id):
     """Supprime un contexte orphelin de la base."""
     try:
-        conn = get_db_connection()
+        conn = db()
         if not conn:
             return jsonify({'success': False, 'message': 'Connexion DB impossible'}), 500
 
@@ -449,7 +939,9 @@ def delete_orphan(context_id):
         """, (context_id,))
 
         conn.commit()
-        conn.close()
+        get_missing_file_paths.cache_clear()
+        invalidate_context_borderlines(context_id)
+        invalidate_status_caches()
 
         return jsonify({
             'success': True,
@@ -464,64 +956,47 @@ def delete_orphan(context_id):
 def rebuild_orphan(context_id):
     """Reconstruit le JSON d'un contexte orphelin."""
     try:
-        conn = get_db_connection()
+        conn = db()
         if not conn:
             return jsonify({'success': False, 'message': 'Connexion DB impossible'}), 500
 
         cursor = conn.cursor()
 
+        # Lectures 1 à 3 dans une seule transaction : un seul verrou partagé et
+        # un instantané cohérent (une exception la laisse au rollback du pool)
+        cursor.execute("BEGIN")
+
         # 1. Récupérer le contexte
-        cursor.execute("""
-            SELECT 
-                rc.original_name, rc.table_format, rc.hero_position,
-                rc.vs_position, rc.primary_action, rc.game_type,
-                rc.variant, rc.stack_depth, rc.stakes, rc.sizing,
-                rf.file_path
-            FROM range_contexts rc
-            JOIN range_files rf ON rc.file_id = rf.id
-            WHERE rc.id = ?
-        """, (context_id,))
+        cursor.execute(SQL_REBUILD_CONTEXT, (context_id,))
 
         context_row = cursor.fetchone()
         if not context_row:
-            conn.close()
+            conn.rollback()
             return jsonify({'success': False, 'message': 'Contexte non trouvé'}), 404
 
         # 2. Récupérer les ranges
-        cursor.execute("""
-            SELECT range_key, name, color, label_canon
-            FROM ranges
-            WHERE context_id = ?
-            ORDER BY CAST(range_key AS INTEGER)
-        """, (context_id,))
+        cursor.execute(SQL_REBUILD_RANGES, (context_id,))
 
+        range_rows = cursor.fetchall()
         ranges_data = {}
-        max_index = 0
-        for range_key, name, color, label_canon in cursor.fetchall():
+        for range_key, name, color, label_canon, _ in range_rows:
             ranges_data[range_key] = {
                 "name": name or f"range_{range_key}",
                 "color": color or "#cccccc"
             }
             if label_canon:
                 ranges_data[range_key]["label_canon"] = label_canon
-            max_index = max(max_index, int(range_key))
+        max_index = max(range_rows[-1][4], 0) if range_rows else 0
 
         # 3. Récupérer les mains
-        cursor.execute("""
-            SELECT rh.hand, r.range_key
-            FROM range_hands rh
-            JOIN ranges r ON rh.range_id = r.id
-            WHERE r.context_id = ?
-            ORDER BY rh.hand
-        """, (context_id,))
+        cursor.execute(SQL_REBUILD_HANDS, (context_id,))
 
-        values_data = {}
-        for hand, range_key in cursor.fetchall():
-            if hand not in values_data:
-                values_data[hand] = []
-            values_data[hand].append(int(range_key))
+        values_data = defaultdict(list)
+        for hand, range_index in cursor.fetchall():
+            values_data[hand].append(range_index)
+        values_data = dict(values_data)
 
-        conn.close()
+        conn.commit()
 
         # 4. Construire le JSON
         json_data = {
@@ -554,14 +1029,16 @@ def rebuild_orphan(context_id):
         }
 
         # 5. Écrire le fichier
-        project_root = Path(__file__).parent.parent
-        file_path = project_root / context_row[10]
+        file_path = PROJECT_ROOT / context_row[10]
 
         # Créer le répertoire si nécessaire
         file_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        # Fichier reconstruit par la machine : JSON compact
+        write_json_file(file_path, json_data, pretty=False)
+
+        get_missing_file_paths.cache_clear()
+        invalidate_context_borderlines(context_id)
 
         return jsonify({
             'success': True,
@@ -571,8 +1048,7 @@ def rebuild_orphan(context_id):
         })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log_exception("Erreur rebuild_orphan: %s", e)
         return jsonify({
             'success': False,
             'message': f'Erreur: {str(e)}'
@@ -588,107 +1064,102 @@ def validate_page():
     """Page de validation d'un contexte."""
     if not VALIDATOR_AVAILABLE:
         return "<h1>Erreur</h1><p>Module de validation non disponible</p>", 500
-    return render_template('validate_context.html')
+    return render_static_page('validate_context.html')
+
+
+# Métadonnées complètes d'un contexte ; noms de colonnes = clés JSON (sqlite3.Row)
+SQL_VALIDATION_CONTEXT = """
+    SELECT
+        rc.id, rc.original_name, rc.display_name, rc.cleaned_name,
+        rc.table_format, rc.hero_position, rc.vs_position, rc.primary_action,
+        rc.action_sequence,
+        rc.stack_depth, rc.game_type, rc.variant, rc.sizing, rc.stakes,
+        rc.confidence_score, rc.needs_validation,
+        rf.filename, rf.file_path
+    FROM range_contexts rc
+    LEFT JOIN range_files rf ON rc.file_id = rf.id
+    WHERE rc.id = ?
+"""
+
+
+# Ranges d'un contexte avec leur nombre de mains. Le pipeline n'insère qu'une
+# ligne par (range_id, hand) : COUNT simple, compté sur l'index idx_rh_rid sans dédoublonnage
+SQL_VALIDATION_RANGES = """
+    SELECT
+        r.id, r.range_key, r.name, r.color, r.label_canon,
+        COUNT(rh.hand) as hand_count
+    FROM ranges r
+    LEFT JOIN range_hands rh ON r.id = rh.range_id
+    WHERE r.context_id = ?
+    GROUP BY r.id
+    ORDER BY r.range_key
+"""
 
 
 @app.route('/api/validation/context/<int:context_id>')
 def get_validation_context(context_id):
-    """Retourne les données d'un contexte pour validation"""
-    conn = get_db_connection()
+    """
+    Retourne les données d'un contexte pour validation.
+
+    ?fields=a,b restreint la réponse à ces clés ; le décodage de action_sequence
+    et la requête des ranges ne sont faits que si une clé demandée en dépend.
+    """
+    fields = request.args.get('fields')
+    wanted = frozenset(fields.split(',')) if fields else None
+
+    conn = db()
+    if not conn:
+        return jsonify({'error': 'Base de données non trouvée'}), 500
+    # Lignes nommées sur ce curseur seulement : les colonnes sélectionnées portent
+    # déjà les clés JSON, d'où dict(row) au lieu d'un dépilage par index
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
 
     # Récupérer TOUTES les métadonnées
-    cursor.execute("""
-        SELECT 
-            rc.id, rc.original_name, rc.display_name, rc.cleaned_name,
-            rc.table_format, rc.hero_position, rc.vs_position, rc.primary_action,
-            rc.action_sequence,
-            rc.stack_depth, rc.game_type, rc.variant, rc.sizing, rc.stakes,
-            rc.confidence_score, rc.needs_validation,
-            rf.filename, rf.file_path
-        FROM range_contexts rc
-        LEFT JOIN range_files rf ON rc.file_id = rf.id
-        WHERE rc.id = ?
-    """, (context_id,))
+    cursor.execute(SQL_VALIDATION_CONTEXT, (context_id,))
 
     row = cursor.fetchone()
 
     if not row:
-        conn.close()
         return jsonify({'error': 'Contexte non trouvé'}), 404
 
     # Construire le contexte
-    context = {
-        'id': row[0],
-        'original_name': row[1],
-        'display_name': row[2],
-        'cleaned_name': row[3],
-        'table_format': row[4],
-        'hero_position': row[5],
-        'vs_position': row[6],
-        'primary_action': row[7],
-        'action_sequence': json.loads(row[8]) if row[8] else None,
-        'stack_depth': row[9],
-        'game_type': row[10],
-        'variant': row[11],
-        'sizing': row[12],
-        'stakes': row[13],
-        'confidence_score': row[14],
-        'needs_validation': row[15],
-        'filename': row[16],
-        'file_path': row[17]
-    }
+    context = dict(row)
+    needs_sequence = wanted is None or not wanted.isdisjoint(('action_sequence', 'human_title', 'slug'))
+    raw_sequence = context['action_sequence']
+    context['action_sequence'] = _loads(raw_sequence) if raw_sequence and needs_sequence else None
 
     # 🆕 Générer human_title et slug avec la fonction helper
-    if context['table_format'] and context['hero_position'] and context['primary_action']:
-        context['human_title'], context['slug'] = generate_human_title_and_slug(
-            context['table_format'],
-            context['hero_position'],
-            context['primary_action'],
-            context['action_sequence'],
-            context['stack_depth']
-        )
-    else:
-        context['human_title'] = context['display_name'] or context['original_name']
-        context['slug'] = context['cleaned_name'] or context['original_name']
+    if needs_sequence:
+        if context['table_format'] and context['hero_position'] and context['primary_action']:
+            context['human_title'], context['slug'] = generate_human_title_and_slug(
+                context['table_format'],
+                context['hero_position'],
+                context['primary_action'],
+                context['action_sequence'],
+                context['stack_depth']
+            )
+        else:
+            context['human_title'] = context['display_name'] or context['original_name']
+            context['slug'] = context['cleaned_name'] or context['original_name']
 
-    # Récupérer les ranges et leurs mains
-    cursor.execute("""
-        SELECT 
-            r.id, r.range_key, r.name, r.color, r.label_canon,
-            COUNT(DISTINCT rh.hand) as hand_count
-        FROM ranges r
-        LEFT JOIN range_hands rh ON r.id = rh.range_id
-        WHERE r.context_id = ?
-        GROUP BY r.id
-        ORDER BY r.range_key
-    """, (context_id,))
-
-    ranges = []
-    for r in cursor.fetchall():
-        ranges.append({
-            'id': r[0],
-            'range_key': r[1],
-            'name': r[2],
-            'color': r[3],
-            'label_canon': r[4],
-            'hand_count': r[5]
-        })
+    # Labels disponibles
+    context['available_labels'] = AVAILABLE_LABELS
 
-    context['ranges'] = ranges
+    if wanted is not None and wanted.isdisjoint(('ranges', 'subranges_summary', 'warnings')):
+        return jsonify({key: value for key, value in context.items() if key in wanted})
 
-    # Résumé des sous-ranges
-    subranges_summary = {}
-    for r in ranges:
-        if r['range_key'] != '1' and r['label_canon']:
-            label = r['label_canon']
-            subranges_summary[label] = subranges_summary.get(label, 0) + 1
+    # Récupérer les ranges et leurs mains
+    cursor.execute(SQL_VALIDATION_RANGES, (context_id,))
 
-    context['subranges_summary'] = subranges_summary
+    ranges = [dict(r) for r in cursor.fetchall()]
 
-    # Labels disponibles
-    from poker_constants import AVAILABLE_LABELS
-    context['available_labels'] = AVAILABLE_LABELS
+    context['ranges'] = ranges
+
+    # Résumé des sous-ranges, compté sur les lignes déjà chargées (pas de 3e requête)
+    context['subranges_summary'] = dict(Counter(
+        r['label_canon'] for r in ranges if r['range_key'] != '1' and r['label_canon']
+    ))
 
     # Générer des warnings si nécessaire
     warnings = []
@@ -701,7 +1172,8 @@ def get_validation_context(context_id):
 
     context['warnings'] = warnings
 
-    conn.close()
+    if wanted is not None:
+        context = {key: value for key, value in context.items() if key in wanted}
     return jsonify(context)
 
 
@@ -713,14 +1185,101 @@ def get_validation_candidates():
 
     try:
         candidates = validator.get_validation_candidates()
-        return jsonify({
-            'count': len(candidates),
-            'contexts': candidates
-        })
+        # Liste non bornée : sérialisée au fil de l'eau
+        return stream_json_array(
+            candidates,
+            prefix=b'{"count":' + str(len(candidates)).encode() + b',"contexts":[',
+            suffix=b']}'
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def parse_range_labels(range_labels_raw):
+    """
+    Convertit les range_labels reçus en {range_id (int): label}.
+
+    Formats acceptés :
+    - liste de paires [[id, label], ...] : ids déjà entiers en JSON, aucune conversion
+    - objet {"id": label, ...} (format historique) : clés converties en entiers
+    """
+    if isinstance(range_labels_raw, list):
+        range_labels = dict(range_labels_raw)
+        if all(type(k) is int for k in range_labels):
+            return range_labels
+        return dict(zip(map(int, range_labels), range_labels.values()))
+    return dict(zip(map(int, range_labels_raw), range_labels_raw.values()))
+
+
+def parse_context_ids(context_ids_raw):
+    """
+    Convertit les IDs de contextes reçus (entiers ou chaînes "1") en entiers,
+    comme les clés des contextes chargés par QuizGenerator.load_contexts.
+
+    Raises:
+        ValueError, TypeError: si un ID n'est pas convertible
+    """
+    return [int(cid) for cid in context_ids_raw]
+
+
+# Réécritures des JSON sources hors du chemin de la requête.
+# Un seul worker : les mises à jour successives d'un même fichier restent ordonnées.
+_json_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='json-writer')
+# {context_id: Future en cours, ou (succès, message) de la dernière mise à jour terminée}
+# Un Future terminé est aussitôt remplacé par son résultat : au plus une entrée par contexte
+_json_jobs = {}
+_json_jobs_lock = threading.Lock()
+
+
+def _write_source_json(context_id, metadata, range_labels):
+    """Tâche du json-writer : met à jour le JSON source et journalise un échec"""
+    success, message = update_source_json(context_id, metadata, range_labels)
+    if not success:
+        logger.error("[JSON] ✗ Mise à jour du JSON source échouée (context_id=%s): %s", context_id, message)
+    return success, message
+
+
+def _finish_json_job(context_id, future):
+    """Remplace le Future terminé par son résultat (sauf si une mise à jour plus récente a été lancée)"""
+    try:
+        outcome = future.result()
+    except Exception as e:
+        logger.exception("[JSON] ✗ Erreur json-writer (context_id=%s)", context_id)
+        outcome = (False, f'Erreur: {str(e)}')
+    with _json_jobs_lock:
+        if _json_jobs.get(context_id) is future:
+            _json_jobs[context_id] = outcome
+
+
+def submit_source_json_update(context_id, metadata, range_labels):
+    """Programme la mise à jour du JSON source ; suivi via /api/validation/json_status/<id>"""
+    future = _json_writer.submit(_write_source_json, context_id, metadata, range_labels)
+    with _json_jobs_lock:
+        _json_jobs[context_id] = future
+    future.add_done_callback(lambda f: _finish_json_job(context_id, f))
+
+
+def rename_no_replace(src: Path, dst: Path):
+    """
+    Renomme src en dst sans jamais écraser dst, de façon atomique.
+
+    link() échoue avec FileExistsError si dst existe (et FileNotFoundError si src
+    manque) : pas de fenêtre entre la vérification et le renommage.
+    """
+    try:
+        os.link(src, dst)
+    except (FileExistsError, FileNotFoundError):
+        raise
+    except OSError:
+        # Système de fichiers sans liens physiques : vérification puis renommage
+        # (même répertoire, donc un simple rename() suffit, sans copie)
+        if dst.exists():
+            raise FileExistsError(dst)
+        os.rename(src, dst)
+        return
+    os.unlink(src)
+
+
 @app.route('/api/validation/validate/<int:context_id>', methods=['POST'])
 def validate_context(context_id):
     """Valide et met à jour les métadonnées d'un contexte ET ses sous-ranges."""
@@ -740,8 +1299,8 @@ def validate_context(context_id):
         range_labels = None
         if range_labels_raw:
             try:
-                range_labels = {int(k): v for k, v in range_labels_raw.items()}
-            except (ValueError, AttributeError) as e:
+                range_labels = parse_range_labels(range_labels_raw)
+            except (ValueError, TypeError, AttributeError) as e:
                 return jsonify({
                     'success': False,
                     'message': f'Format range_labels invalide: {str(e)}'
@@ -757,34 +1316,53 @@ def validate_context(context_id):
         if not success:
             return jsonify({'success': False, 'message': message}), 400
 
-        # Si demandé, mettre à jour le JSON source
+        invalidate_status_caches()
+
+        # Si demandé, mettre à jour le JSON source en arrière-plan :
+        # la base est déjà à jour, la réponse n'attend pas l'écriture disque
         json_updated = False
-        json_message = ""
+        json_message = None
 
         if update_json:
-            json_success, json_message = update_source_json(
-                context_id,
-                data,
-                range_labels
-            )
-            json_updated = json_success
+            submit_source_json_update(context_id, dict(data), range_labels)
+            json_updated = 'pending'
+            json_message = f'Mise à jour du JSON en cours (/api/validation/json_status/{context_id})'
 
         return jsonify({
             'success': True,
             'message': message,
             'json_updated': json_updated,
-            'json_message': json_message if update_json else None
+            'json_message': json_message
         })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log_exception("Erreur validate_context: %s", e)
         return jsonify({
             'success': False,
             'message': f'Erreur serveur: {str(e)}'
         }), 500
 
 
+@app.route('/api/validation/json_status/<int:context_id>')
+def get_json_update_status(context_id):
+    """État de la dernière mise à jour du JSON source lancée pour un contexte."""
+    with _json_jobs_lock:
+        job = _json_jobs.get(context_id)
+
+    if job is None:
+        return jsonify({'status': 'unknown'}), 404
+
+    if isinstance(job, Future):
+        return jsonify({'status': 'pending'})
+
+    json_success, json_message = job
+    return jsonify({
+        'status': 'done' if json_success else 'error',
+        'success': json_success,
+        'message': json_message
+    })
+
+
 @app.route('/api/validation/update-subranges', methods=['POST'])
 def update_subranges():
     """Met à jour uniquement les labels des sous-ranges sans toucher au contexte."""
@@ -803,8 +1381,8 @@ def update_subranges():
 
         # Convertir les clés en entiers
         try:
-            range_labels = {int(k): v for k, v in range_labels_raw.items()}
-        except (ValueError, AttributeError) as e:
+            range_labels = parse_range_labels(range_labels_raw)
+        except (ValueError, TypeError, AttributeError) as e:
             return jsonify({
                 'success': False,
                 'message': f'Format range_labels invalide: {str(e)}'
@@ -814,6 +1392,7 @@ def update_subranges():
         success, message = validator.update_subrange_labels(range_labels)
 
         if success:
+            invalidate_status_caches()
             return jsonify({
                 'success': True,
                 'message': message
@@ -825,8 +1404,7 @@ def update_subranges():
             }), 400
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log_exception("Erreur update_subranges: %s", e)
         return jsonify({
             'success': False,
             'message': f'Erreur serveur: {str(e)}'
@@ -844,6 +1422,8 @@ def ignore_context(context_id):
         reason = data.get('reason', 'Marqué manuellement comme non exploitable')
 
         success = validator.mark_as_non_exploitable(context_id, reason)
+        if success:
+            invalidate_status_caches()
 
         return jsonify({
             'success': success,
@@ -868,7 +1448,7 @@ def rename_context_file(context_id):
 
         new_filename = f"{slug}.json"
 
-        conn = get_db_connection()
+        conn = db()
         if not conn:
             return jsonify({'success': False, 'message': 'Connexion DB impossible'}), 500
 
@@ -883,41 +1463,38 @@ def rename_context_file(context_id):
 
         result = cursor.fetchone()
         if not result:
-            conn.close()
             return jsonify({'success': False, 'message': 'Contexte non trouvé'}), 404
 
         old_path_relative, old_filename, file_id = result
 
-        project_root = Path(__file__).parent.parent
-        old_path = project_root / old_path_relative
-
-        if not old_path.exists():
-            conn.close()
-            return jsonify({
-                'success': False,
-                'message': f'Fichier source non trouvé: {old_path}'
-            }), 404
-
+        old_path = PROJECT_ROOT / old_path_relative
         new_path = old_path.parent / new_filename
-        new_path_relative = str(new_path.relative_to(project_root))
+        new_path_relative = str(new_path.relative_to(PROJECT_ROOT))
 
-        if new_path.exists() and new_path != old_path:
-            conn.close()
-            return jsonify({
-                'success': False,
-                'message': f'Un fichier nommé "{new_filename}" existe déjà'
-            }), 409
+        source_missing = jsonify({
+            'success': False,
+            'message': f'Fichier source non trouvé: {old_path}'
+        }), 404
 
         if old_path == new_path:
-            conn.close()
+            if not old_path.exists():
+                return source_missing
             return jsonify({
                 'success': True,
                 'message': 'Le fichier a déjà le bon nom',
                 'filename': new_filename
             })
 
-        import shutil
-        shutil.move(str(old_path), str(new_path))
+        # Les vérifications d'existence sont portées par le renommage lui-même
+        try:
+            rename_no_replace(old_path, new_path)
+        except FileNotFoundError:
+            return source_missing
+        except FileExistsError:
+            return jsonify({
+                'success': False,
+                'message': f'Un fichier nommé "{new_filename}" existe déjà'
+            }), 409
 
         cursor.execute("""
             UPDATE range_files
@@ -928,7 +1505,8 @@ def rename_context_file(context_id):
         """, (new_filename, new_path_relative, file_id))
 
         conn.commit()
-        conn.close()
+        get_missing_file_paths.cache_clear()
+        invalidate_status_caches()
 
         return jsonify({
             'success': True,
@@ -938,8 +1516,7 @@ def rename_context_file(context_id):
         })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log_exception("Erreur rename_context_file: %s", e)
         return jsonify({
             'success': False,
             'message': f'Erreur: {str(e)}'
@@ -950,59 +1527,154 @@ def rename_context_file(context_id):
 def get_validation_stats():
     """Récupère des statistiques sur les contextes à valider."""
     try:
-        conn = get_db_connection()
+        conn = db()
         if not conn:
-            return jsonify({'total_pending': 0, 'by_confidence': {}})
+            return jsonify(_validation_stats(None))
 
-        cursor = conn.cursor()
+        etag = data_etag(conn)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
 
-        cursor.execute("SELECT COUNT(*) FROM range_contexts WHERE needs_validation = 1")
-        total = cursor.fetchone()[0]
+        return with_etag(jsonify(_validation_stats(etag)), etag)
 
-        cursor.execute("""
-            SELECT 
-                CASE 
-                    WHEN confidence_score < 50 THEN 'low'
-                    WHEN confidence_score < 80 THEN 'medium'
-                    ELSE 'high'
-                END as level,
-                COUNT(*) as count
-            FROM range_contexts 
-            WHERE needs_validation = 1
-            GROUP BY level
-        """)
-        by_conf = {row[0]: row[1] for row in cursor.fetchall()}
+    except Exception as e:
+        log_exception("Erreur get_validation_stats: %s", e)
+        return jsonify({'error': str(e)}), 500
 
-        conn.close()
 
-        return jsonify({
-            'total_pending': total,
-            'by_confidence': by_conf
-        })
+@lru_cache(maxsize=1)
+def _validation_stats(etag):
+    """
+    Compteurs de validation (interrogés en boucle par le dashboard), par version des données.
+    Seule la version courante est gardée : un nouvel ETag remplace l'entrée précédente.
+    """
+    conn = db()
+    if not conn:
+        return {'total_pending': 0, 'by_confidence': {}}
+
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT COUNT(*) FROM range_contexts WHERE needs_validation = 1")
+    total = cursor.fetchone()[0]
+
+    cursor.execute("""
+        SELECT 
+            CASE 
+                WHEN confidence_score < 50 THEN 'low'
+                WHEN confidence_score < 80 THEN 'medium'
+                ELSE 'high'
+            END as level,
+            COUNT(*) as count
+        FROM range_contexts 
+        WHERE needs_validation = 1
+        GROUP BY level
+    """)
+    by_conf = {row[0]: row[1] for row in cursor.fetchall()}
+
+    return {
+        'total_pending': total,
+        'by_confidence': by_conf
+    }
+
+
+# Empreinte des écritures faites hors de l'application (pipeline lancé en ligne de
+# commande) : nouveaux contextes/ranges/mains, changements de statut
+SQL_DATA_SIGNATURE = """
+    SELECT
+        MAX(id), COUNT(*),
+        COALESCE(SUM(needs_validation), 0), COALESCE(SUM(quiz_ready), 0),
+        (SELECT MAX(id) FROM ranges),
+        (SELECT MAX(id) FROM range_hands)
+    FROM range_contexts
+"""
+
+# Génération des données, incrémentée à chaque écriture faite par l'application
+_data_generation = 0
+
+
+def data_etag(conn):
+    """ETag des vues du dashboard : génération locale + empreinte de la base"""
+    signature = conn.execute(SQL_DATA_SIGNATURE).fetchone()
+    return '-'.join(map(str, (_data_generation, *signature)))
+
+
+def _etag_matches(etag):
+    """True si If-None-Match contient l'ETag, y compris suffixé par Flask-Compress (":gzip", ":br"...)"""
+    if_none_match = request.if_none_match
+    if if_none_match.contains(etag):
+        return True
+    prefix = etag + ':'
+    return any(tag.startswith(prefix) for tag in if_none_match.as_set())
 
-    except Exception as e:
-        print(f"Erreur get_validation_stats: {e}")
-        return jsonify({'error': str(e)}), 500
+
+def not_modified(etag):
+    """Réponse 304 si le client possède déjà cette version, sinon None"""
+    if _etag_matches(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Ajoute l'ETag ; no-cache : le navigateur revalide à chaque interrogation"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def invalidate_status_caches():
+    """Vide les compteurs mis en cache après une écriture (validation, import...)"""
+    global _data_generation
+    _data_generation += 1
+    _validation_stats.cache_clear()
+    _pipeline_stats.cache_clear()
+    _quiz_check_counts.cache_clear()
+    _CTX_CACHE['sig'] = None
 
 
 # ============================================
 # ROUTES PIPELINE
 # ============================================
 
+# Un seul import à la fois : le pipeline scanne data/ranges et écrit dans la base
+_pipeline_lock = threading.Lock()
+
+
+def _run_pipeline():
+    """
+    Exécute le pipeline intégré et retourne (succès, sortie, erreur).
+
+    Dans le process quand pipeline_runner est importable : pas de démarrage
+    d'interpréteur ni de réimport des modules à chaque import.
+    """
+    with _pipeline_lock:
+        if IntegratedPipeline is None:
+            result = subprocess.run([
+                sys.executable, 'integrated_pipeline.py'
+            ], cwd=PROJECT_ROOT, capture_output=True, text=True)
+            return result.returncode == 0, result.stdout, result.stderr
+
+        # Chemins absolus : les valeurs par défaut sont relatives au cwd
+        pipeline = IntegratedPipeline(str(PROJECT_ROOT / "data" / "ranges"), str(DB_PATH))
+        outcome = pipeline.run_complete_pipeline()
+    return outcome['success'], outcome.get('message', ''), outcome.get('error')
+
+
 @app.route('/api/import_pipeline', methods=['POST'])
 def api_import_pipeline():
     """Lance le pipeline intégré avec détection des contextes à valider"""
     try:
         os.environ['POKER_WEB_MODE'] = '1'
-        project_root = Path(__file__).parent.parent
 
-        print("Lancement du pipeline intégré...")
+        logger.info("Lancement du pipeline intégré...")
+
+        success, output, error = _run_pipeline()
 
-        result = subprocess.run([
-            sys.executable, 'integrated_pipeline.py'
-        ], cwd=project_root, capture_output=True, text=True)
+        _invalidate_after_pipeline()
 
-        if result.returncode == 0:
+        if success:
             stats = get_pipeline_stats()
             contexts_to_validate = get_contexts_needing_validation()
 
@@ -1012,16 +1684,16 @@ def api_import_pipeline():
                 'message': 'Pipeline intégré terminé avec succès',
                 'stats': stats,
                 'contexts_to_validate': contexts_to_validate,
-                'output': result.stdout,
-                'error': result.stderr if result.stderr else None
+                'output': output,
+                'error': error or None
             })
         else:
             return jsonify({
                 'success': False,
                 'status': 'error',
                 'message': 'Erreur lors du pipeline intégré',
-                'output': result.stdout,
-                'error': result.stderr
+                'output': output,
+                'error': error
             }), 500
 
     except Exception as e:
@@ -1032,88 +1704,140 @@ def api_import_pipeline():
         }), 500
 
 
-def get_pipeline_stats():
-    """Récupère les statistiques du pipeline depuis la DB"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return {
-                'total_files': 0, 'total_contexts': 0, 'total_ranges': 0,
-                'total_hands': 0, 'quiz_ready': 0, 'needs_validation': 0, 'errors': 0
-            }
-
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM range_files")
-        total_files = cursor.fetchone()[0]
+@app.route('/api/import_pipeline/stream')
+def api_import_pipeline_stream():
+    """Lance le pipeline intégré et diffuse sa sortie ligne par ligne (Server-Sent Events)"""
+    os.environ['POKER_WEB_MODE'] = '1'
 
-        cursor.execute("SELECT COUNT(*) FROM range_contexts")
-        total_contexts = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM ranges")
-        total_ranges = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM range_hands")
-        total_hands = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM range_contexts WHERE quiz_ready = 1")
-        quiz_ready = cursor.fetchone()[0]
+    def generate():
+        # Même verrou que /api/import_pipeline : jamais deux imports en parallèle
+        if not _pipeline_lock.acquire(blocking=False):
+            yield b"event: done\ndata: " + _dumps_bytes({
+                'success': False,
+                'error': 'Un import est déjà en cours'
+            }) + b"\n\n"
+            return
 
-        cursor.execute("SELECT COUNT(*) FROM range_contexts WHERE needs_validation = 1")
-        needs_validation = cursor.fetchone()[0]
+        try:
+            # -u : sortie non bufferisée pour recevoir la progression au fil de l'eau
+            proc = subprocess.Popen(
+                [sys.executable, '-u', 'integrated_pipeline.py'],
+                cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, bufsize=1
+            )
+            try:
+                for line in proc.stdout:
+                    yield f"data: {line.rstrip()}\n\n"
+                returncode = proc.wait()
+            finally:
+                if proc.poll() is None:
+                    # Client déconnecté : on ne laisse pas tourner un pipeline orphelin
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+        finally:
+            _pipeline_lock.release()
+
+        _invalidate_after_pipeline()
+
+        result = {'success': returncode == 0, 'returncode': returncode}
+        if returncode == 0:
+            result['stats'] = get_pipeline_stats()
+        yield b"event: done\ndata: " + _dumps_bytes(result) + b"\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _invalidate_after_pipeline():
+    """Le pipeline a pu ajouter ou supprimer des fichiers et des ranges"""
+    get_missing_file_paths.cache_clear()
+    invalidate_context_borderlines()
+    invalidate_status_caches()
+
+
+# Compteurs du pipeline, uniquement depuis des index : statuts agrégés sur
+# idx_ctx_dashboard (couvrant), erreurs comptées sur l'index partiel idx_ctx_errors
+SQL_PIPELINE_STATS = """
+    SELECT
+        (SELECT COUNT(*) FROM range_files),
+        COUNT(*),
+        (SELECT COUNT(*) FROM ranges),
+        (SELECT COUNT(*) FROM range_hands),
+        COALESCE(SUM(quiz_ready = 1), 0),
+        COALESCE(SUM(needs_validation = 1), 0),
+        (SELECT COUNT(*) FROM range_contexts WHERE error_message IS NOT NULL)
+    FROM range_contexts
+"""
 
-        cursor.execute("SELECT COUNT(*) FROM range_contexts WHERE error_message IS NOT NULL")
-        errors = cursor.fetchone()[0]
 
-        conn.close()
+def get_pipeline_stats():
+    """Récupère les statistiques du pipeline depuis la DB"""
+    try:
+        return _pipeline_stats()
 
+    except Exception as e:
+        log_exception("Erreur get_pipeline_stats: %s", e)
         return {
-            'total_files': total_files,
-            'total_contexts': total_contexts,
-            'total_ranges': total_ranges,
-            'total_hands': total_hands,
-            'quiz_ready': quiz_ready,
-            'needs_validation': needs_validation,
-            'errors': errors
+            'total_files': 0, 'total_contexts': 0, 'total_ranges': 0,
+            'total_hands': 0, 'quiz_ready': 0, 'needs_validation': 0, 'errors': 0
         }
 
-    except Exception as e:
-        print(f"Erreur get_pipeline_stats: {e}")
+
+@ttl_cache(5)
+def _pipeline_stats():
+    """Compteurs du pipeline (dashboard rafraîchi en boucle), invalidés après écriture"""
+    conn = db()
+    if not conn:
         return {
             'total_files': 0, 'total_contexts': 0, 'total_ranges': 0,
             'total_hands': 0, 'quiz_ready': 0, 'needs_validation': 0, 'errors': 0
         }
 
+    cursor = conn.cursor()
+
+    cursor.execute(SQL_PIPELINE_STATS)
+    (total_files, total_contexts, total_ranges, total_hands,
+     quiz_ready, needs_validation, errors) = cursor.fetchone()
+
+    return {
+        'total_files': total_files,
+        'total_contexts': total_contexts,
+        'total_ranges': total_ranges,
+        'total_hands': total_hands,
+        'quiz_ready': quiz_ready,
+        'needs_validation': needs_validation,
+        'errors': errors
+    }
+
+
+# Nom affiché d'un contexte, calculé par SQLite (chaînes vides traitées comme absentes)
+CONTEXT_NAME_SQL = "COALESCE(NULLIF(display_name, ''), NULLIF(original_name, ''), 'Sans nom')"
+
 
 def get_contexts_needing_validation():
     """Récupère la liste des contextes nécessitant validation"""
     try:
-        conn = get_db_connection()
+        conn = db()
         if not conn:
             return []
 
         cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT id, display_name, original_name, confidence_score 
+        cursor.execute(f"""
+            SELECT id, {CONTEXT_NAME_SQL}, COALESCE(confidence_score, 0)
             FROM range_contexts 
             WHERE needs_validation = 1 
             LIMIT 5
         """)
 
-        contexts = []
-        for row in cursor.fetchall():
-            contexts.append({
-                'id': row[0],
-                'name': row[1] or row[2] or 'Sans nom',
-                'confidence': row[3] or 0
-            })
-
-        conn.close()
-        return contexts
+        return [
+            {'id': row[0], 'name': row[1], 'confidence': row[2]}
+            for row in cursor.fetchall()
+        ]
 
     except Exception as e:
-        print(f"Erreur get_contexts_needing_validation: {e}")
+        log_exception("Erreur get_contexts_needing_validation: %s", e)
         return []
 
 
@@ -1125,7 +1849,7 @@ def get_contexts_needing_validation():
 def api_debug_db():
     """API debug pour les statistiques de base"""
     try:
-        conn = get_db_connection()
+        conn = db()
 
         if not conn:
             return jsonify({
@@ -1140,33 +1864,39 @@ def api_debug_db():
 
         cursor = conn.cursor()
 
-        stats = {}
-        for table in ['range_files', 'range_contexts', 'ranges', 'range_hands']:
-            try:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                stats[table] = cursor.fetchone()[0]
-            except sqlite3.OperationalError:
-                stats[table] = 0
-
+        tables = ['range_files', 'range_contexts', 'ranges', 'range_hands']
         try:
             cursor.execute("""
-                SELECT id, display_name, original_name, confidence_score 
+                SELECT
+                    (SELECT COUNT(*) FROM range_files),
+                    (SELECT COUNT(*) FROM range_contexts),
+                    (SELECT COUNT(*) FROM ranges),
+                    (SELECT COUNT(*) FROM range_hands)
+            """)
+            stats = dict(zip(tables, cursor.fetchone()))
+        except sqlite3.OperationalError:
+            # Schéma incomplet : comptage table par table
+            stats = {}
+            for table in tables:
+                try:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                    stats[table] = cursor.fetchone()[0]
+                except sqlite3.OperationalError:
+                    stats[table] = 0
+
+        try:
+            cursor.execute(f"""
+                SELECT id, {CONTEXT_NAME_SQL}, COALESCE(confidence_score, 0)
                 FROM range_contexts 
                 LIMIT 5
             """)
             examples = [
-                {
-                    'id': row[0],
-                    'name': row[1] or row[2] or 'Sans nom',
-                    'confidence': row[3] or 0
-                }
+                {'id': row[0], 'name': row[1], 'confidence': row[2]}
                 for row in cursor.fetchall()
             ]
         except sqlite3.OperationalError:
             examples = []
 
-        conn.close()
-
         return jsonify({
             'status': 'success',
             'data': stats,
@@ -1184,7 +1914,7 @@ def api_dashboard_stats():
         stats = get_pipeline_stats()
 
         # Ajouter les stats d'import récents si nécessaire
-        conn = get_db_connection()
+        conn = db()
         if conn:
             cursor = conn.cursor()
             cursor.execute("""
@@ -1197,7 +1927,6 @@ def api_dashboard_stats():
                 {'filename': row[0], 'date': row[1]}
                 for row in cursor.fetchall()
             ]
-            conn.close()
         else:
             recent_imports = []
 
@@ -1208,7 +1937,7 @@ def api_dashboard_stats():
         })
 
     except Exception as e:
-        print(f"Erreur api_dashboard_stats: {e}")
+        log_exception("Erreur api_dashboard_stats: %s", e)
         return jsonify({
             'status': 'error',
             'error': str(e),
@@ -1221,68 +1950,86 @@ def api_dashboard_stats():
         }), 500
 
 
+# Contextes du dashboard : les 50 premiers sont choisis d'abord (index
+# idx_ctx_dashboard), puis leurs ranges/mains comptées en un seul passage
+SQL_DASHBOARD_CONTEXTS = """
+    WITH page AS (
+        SELECT rc.id
+        FROM range_contexts rc
+        JOIN range_files rf ON rc.file_id = rf.id
+        ORDER BY rc.needs_validation DESC, rc.quiz_ready DESC, rc.id DESC
+        LIMIT 50
+    )
+    SELECT
+        rc.id,
+        COALESCE(NULLIF(rc.display_name, ''), NULLIF(rc.original_name, ''), 'Sans nom'),
+        COALESCE(rc.confidence_score, 0) / 100.0,
+        COALESCE(NULLIF(rc.hero_position, ''), 'N/A'),
+        COALESCE(NULLIF(rc.primary_action, ''), 'N/A'),
+        rf.filename,
+        COALESCE(cnt.ranges_count, 0) as ranges_count,
+        COALESCE(cnt.hands_count, 0) as hands_count,
+        CASE
+            WHEN rc.needs_validation THEN 'needs_validation'
+            WHEN rc.quiz_ready THEN 'quiz_ready'
+            WHEN rc.error_message IS NOT NULL AND rc.error_message != '' THEN 'error'
+            ELSE 'unknown'
+        END as context_status
+    FROM page
+    JOIN range_contexts rc ON rc.id = page.id
+    JOIN range_files rf ON rc.file_id = rf.id
+    LEFT JOIN (
+        SELECT r.context_id,
+               COUNT(DISTINCT r.id) AS ranges_count,
+               COUNT(rh.hand) AS hands_count
+        FROM page
+        JOIN ranges r ON r.context_id = page.id
+        LEFT JOIN range_hands rh ON rh.range_id = r.id
+        GROUP BY r.context_id
+    ) cnt ON cnt.context_id = rc.id
+    ORDER BY rc.needs_validation DESC, rc.quiz_ready DESC, rc.id DESC
+"""
+
+
 @app.route('/api/dashboard/contexts')
 def api_dashboard_contexts():
     """API pour les contextes du dashboard avec statuts corrects"""
     try:
-        conn = get_db_connection()
+        conn = db()
         if not conn:
             return jsonify([])
 
-        cursor = conn.cursor()
+        # Dashboard interrogé en boucle : rien n'est relu si le client est à jour
+        etag = data_etag(conn)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
 
-        cursor.execute("""
-            SELECT 
-                rc.id,
-                rc.display_name,
-                rc.original_name,
-                rc.confidence_score,
-                rc.hero_position,
-                rc.primary_action,
-                rc.needs_validation,
-                rc.quiz_ready,
-                rc.error_message,
-                rf.filename,
-                (SELECT COUNT(*) FROM ranges WHERE context_id = rc.id) as ranges_count,
-                (SELECT COUNT(*) FROM range_hands rh 
-                 JOIN ranges r ON r.id = rh.range_id 
-                 WHERE r.context_id = rc.id) as hands_count
-            FROM range_contexts rc
-            JOIN range_files rf ON rc.file_id = rf.id
-            ORDER BY rc.needs_validation DESC, rc.quiz_ready DESC, rc.id DESC
-            LIMIT 50
-        """)
-
-        contexts = []
-        for row in cursor.fetchall():
-            if row[6]:
-                context_status = 'needs_validation'
-            elif row[7]:
-                context_status = 'quiz_ready'
-            elif row[8]:
-                context_status = 'error'
-            else:
-                context_status = 'unknown'
-
-            contexts.append({
-                'id': row[0],
-                'name': row[1] or row[2] or 'Sans nom',
-                'confidence': (row[3] or 0) / 100.0,
-                'filename': row[9],
-                'hero_position': row[4] or 'N/A',
-                'primary_action': row[5] or 'N/A',
-                'context_status': context_status,
-                'ranges_count': row[10] or 0,
-                'hands_count': row[11] or 0
-            })
+        cursor = conn.cursor()
 
-        conn.close()
-        return jsonify(contexts)
+        cursor.execute(SQL_DASHBOARD_CONTEXTS)
+
+        def contexts():
+            # Lecture par lots depuis le curseur (tuples indexés), sérialisés un à un
+            cursor.arraysize = 256
+            for rows in iter(cursor.fetchmany, []):
+                for row in rows:
+                    yield {
+                        'id': row[0],
+                        'name': row[1],
+                        'confidence': row[2],
+                        'filename': row[5],
+                        'hero_position': row[3],
+                        'primary_action': row[4],
+                        'context_status': row[8],
+                        'ranges_count': row[6],
+                        'hands_count': row[7]
+                    }
+
+        return with_etag(stream_json_array(contexts()), etag)
 
     except Exception as e:
-        print(f"Erreur dans api_dashboard_contexts: {e}")
-        import traceback
-        traceback.print_exc()
+        log_exception("Erreur dans api_dashboard_contexts: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1294,8 +2041,8 @@ def api_dashboard_contexts():
 def api_quiz_check():
     """Vérifie si des contextes sont prêts pour le quiz"""
     try:
-        conn = get_db_connection()
-        if not conn:
+        counts = _quiz_check_counts()
+        if counts is None:
             return jsonify({
                 'ready': False,
                 'message': 'Base de données non initialisée',
@@ -1303,15 +2050,7 @@ def api_quiz_check():
                 'total_contexts': 0
             })
 
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM range_contexts WHERE quiz_ready = 1")
-        ready_count = cursor.fetchone()[0]
-
-        cursor.execute("SELECT COUNT(*) FROM range_contexts")
-        total_count = cursor.fetchone()[0]
-
-        conn.close()
+        ready_count, total_count = counts
 
         return jsonify({
             'ready': ready_count > 0,
@@ -1327,63 +2066,40 @@ def api_quiz_check():
         }), 500
 
 
-@app.route('/debug_structure')
-def debug_structure():
-    """Affiche la structure de la base de données"""
-    conn = get_db_connection()
+@ttl_cache(30)
+def _quiz_check_counts():
+    """(contextes prêts, contextes totaux), ou None si la base n'existe pas"""
+    conn = db()
     if not conn:
-        return "<h1>Base de données non trouvée</h1>"
+        return None
 
     cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COALESCE(SUM(quiz_ready = 1), 0), COUNT(*)
+        FROM range_contexts
+    """)
+    return tuple(cursor.fetchone())
 
-    cursor.execute("PRAGMA table_info(ranges)")
-    ranges_columns = cursor.fetchall()
-
-    cursor.execute("PRAGMA table_info(range_contexts)")
-    contexts_columns = cursor.fetchall()
-
-    result = "<h1>Structure de la base de données</h1>"
 
-    result += "<h2>Table: range_contexts</h2>"
-    result += "<table border='1' cellpadding='10'>"
-    result += "<tr><th>ID</th><th>Nom</th><th>Type</th><th>NOT NULL</th><th>Default</th></tr>"
-    for col in contexts_columns:
-        result += f"<tr><td>{col[0]}</td><td><strong>{col[1]}</strong></td><td>{col[2]}</td><td>{'Oui' if col[3] else 'Non'}</td><td>{col[4]}</td></tr>"
-    result += "</table>"
+@app.route('/debug_structure')
+def debug_structure():
+    """Affiche la structure de la base de données"""
+    if not DB_PATH.exists():
+        return "<h1>Base de données non trouvée</h1>"
 
-    result += "<h2>Table: ranges</h2>"
-    result += "<table border='1' cellpadding='10'>"
-    result += "<tr><th>ID</th><th>Nom</th><th>Type</th><th>NOT NULL</th><th>Default</th></tr>"
-    for col in ranges_columns:
-        highlight = ' style="background-color: #ffff99;"' if col[1] == 'label_canon' else ''
-        result += f"<tr{highlight}><td>{col[0]}</td><td><strong>{col[1]}</strong></td><td>{col[2]}</td><td>{'Oui' if col[3] else 'Non'}</td><td>{col[4]}</td></tr>"
-    result += "</table>"
+    ranges_columns = _table_info('ranges')
+    contexts_columns = _table_info('range_contexts')
 
     has_label_canon = any(col[1] == 'label_canon' for col in ranges_columns)
-    if has_label_canon:
-        result += '<p style="color: green; font-weight: bold;">✓ Colonne label_canon présente</p>'
-
-        cursor.execute("""
-            SELECT label_canon, COUNT(*) as count
-            FROM ranges
-            WHERE label_canon IS NOT NULL
-            GROUP BY label_canon
-            ORDER BY count DESC
-        """)
-        label_stats = cursor.fetchall()
-
-        if label_stats:
-            result += "<h3>Distribution des labels canoniques</h3>"
-            result += "<table border='1' cellpadding='10'>"
-            result += "<tr><th>Label</th><th>Count</th></tr>"
-            for label, count in label_stats:
-                result += f"<tr><td><strong>{label}</strong></td><td>{count}</td></tr>"
-            result += "</table>"
-    else:
-        result += '<p style="color: red; font-weight: bold;">✗ Colonne label_canon absente - Migration nécessaire!</p>'
+    label_stats = _label_canon_distribution() if has_label_canon else ()
 
-    conn.close()
-    return result
+    return Response(stream_template(
+        'debug_structure.html',
+        contexts_columns=contexts_columns,
+        ranges_columns=ranges_columns,
+        has_label_canon=has_label_canon,
+        label_stats=label_stats
+    ))
 
 
 # ============================================
@@ -1393,18 +2109,40 @@ def debug_structure():
 @app.route('/quiz-setup')
 def quiz_setup():
     """Page de configuration du quiz"""
-    return render_template('quiz_setup.html')
-
-
-@app.route('/api/quiz/available-contexts')
-def get_available_contexts():
-    """Récupère tous les contextes validés prêts pour le quiz"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT 
+    return render_static_page('quiz_setup.html')
+
+
+# Cache de /api/quiz/available-contexts : {'sig': signature DB, 'payload': bytes JSON, 'ts': horodatage}
+AVAILABLE_CONTEXTS_TTL = 30
+_CTX_CACHE = {'sig': None, 'payload': None, 'ts': 0.0}
+
+# Signature bon marché : change dès qu'un contexte devient (ou cesse d'être) prêt
+SQL_AVAILABLE_CONTEXTS_SIG = "SELECT MAX(id), COUNT(*) FROM range_contexts WHERE quiz_ready = 1"
+
+# Réponse complète construite par SQLite (JSON1) : ni tuples ni dicts côté Python.
+# json_group_array agrège dans l'ordre où il reçoit les lignes : elles viennent d'une
+# sous-requête triée explicitement (display_name puis id), jamais aplatie dans un
+# agrégat par SQLite (l'ORDER BY dans l'agrégat n'existe qu'à partir de SQLite 3.44)
+SQL_AVAILABLE_CONTEXTS_JSON = """
+    SELECT json_object(
+        'success', json('true'),
+        'contexts', json_group_array(json_object(
+            'id', id,
+            'display_name', display_name,
+            'table_format', table_format,
+            'hero_position', hero_position,
+            'primary_action', primary_action,
+            'vs_position', vs_position,
+            'stack_depth', stack_depth,
+            'variant', variant,
+            'range_count', range_count
+        )),
+        'total', COUNT(*)
+    )
+    FROM (
+        SELECT *
+        FROM (
+            SELECT
                 rc.id,
                 rc.display_name,
                 rc.table_format,
@@ -1419,30 +2157,36 @@ def get_available_contexts():
             WHERE rc.quiz_ready = 1
             GROUP BY rc.id
             HAVING range_count > 0
-            ORDER BY rc.display_name
-        """)
+        )
+        ORDER BY display_name, id
+    )
+"""
 
-        contexts = []
-        for row in cursor.fetchall():
-            contexts.append({
-                'id': row[0],
-                'display_name': row[1],
-                'table_format': row[2],
-                'hero_position': row[3],
-                'primary_action': row[4],
-                'vs_position': row[5],
-                'stack_depth': row[6],
-                'variant': row[7],
-                'range_count': row[8]
-            })
 
-        conn.close()
+@app.route('/api/quiz/available-contexts')
+def get_available_contexts():
+    """Récupère tous les contextes validés prêts pour le quiz"""
+    try:
+        conn = db()
+        if not conn:
+            return jsonify({'success': True, 'contexts': [], 'total': 0})
 
-        return jsonify({
-            'success': True,
-            'contexts': contexts,
-            'total': len(contexts)
-        })
+        cursor = conn.cursor()
+
+        cursor.execute(SQL_AVAILABLE_CONTEXTS_SIG)
+        signature = tuple(cursor.fetchone())
+
+        if (_CTX_CACHE['sig'] == signature
+                and time.monotonic() - _CTX_CACHE['ts'] < AVAILABLE_CONTEXTS_TTL):
+            return Response(_CTX_CACHE['payload'], mimetype='application/json')
+
+        cursor.execute(SQL_AVAILABLE_CONTEXTS_JSON)
+
+        # Réponse produite une seule fois par SQLite, resservie telle quelle
+        payload = cursor.fetchone()[0].encode('utf-8')
+        _CTX_CACHE.update(sig=signature, payload=payload, ts=time.monotonic())
+
+        return Response(payload, mimetype='application/json')
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1450,8 +2194,8 @@ def get_available_contexts():
 
 @app.route('/quiz')
 def quiz():
-    """Page du quiz interactif"""
-    return render_template('quiz.html')
+    """Page du quiz interactif (paramètres lus côté client)"""
+    return render_static_page('quiz.html')
 
 
 @app.route('/api/quiz/question', methods=['POST'])
@@ -1466,45 +2210,81 @@ def get_next_quiz_question():
         if not context_ids:
             return jsonify({'error': 'Aucun contexte fourni'}), 400
 
-        # Convertir en set pour recherche O(1)
-        excluded_set = {(q['hand'], q['context_id']) for q in excluded}
-
-        print(f"[QUIZ] Génération question, {len(excluded)} déjà posées, contextes: {context_ids}")
+        # IDs normalisés en entiers (clés des bundles) ; set pour recherche O(1)
+        try:
+            context_ids = parse_context_ids(context_ids)
+            excluded_set = {(q['hand'], int(q['context_id'])) for q in excluded}
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': f'ID de contexte invalide: {str(e)}'}), 400
+
+        # Mains déjà posées par contexte : le générateur les écarte d'emblée
+        excluded_by_context = defaultdict(set)
+        for hand, context_id in excluded_set:
+            excluded_by_context[context_id].add(hand)
+
+        logger.debug("[QUIZ] Génération question, %s déjà posées, contextes: %s", len(excluded), context_ids)
+
+        # Contextes dont toutes les mains ont déjà été posées : inutile de les tirer
+        candidates = [cid for cid in context_ids if len(excluded_by_context[cid]) < len(ALL_POKER_HANDS)]
+        if not candidates:
+            logger.info("[QUIZ] ⚠️ Toutes les mains de tous les contextes ont été posées")
+            return jsonify({
+                'error': 'no_more_questions',
+                'message': 'Toutes les questions disponibles ont été utilisées'
+            }), 404
 
         # Essayer de générer une question unique
         max_attempts = 100
         generator = QuizGenerator(aggression_level=aggression)  # 🎚️ Passer l'agressivité
 
-        for attempt in range(max_attempts):
-            context_id = random.choice(context_ids)
-            print(f"[QUIZ] 🎲 Tentative {attempt + 1}: Contexte sélectionné = {context_id}")
-            question = generator.generate_question(context_id)
+        # Contextes et ranges chargés une seule fois pour toutes les tentatives
+        bundles = generator.load_contexts(candidates, conn=db())
+
+        # Seuls les contextes trouvés en DB et pourvus de ranges peuvent produire
+        # une question : les autres ne consomment plus de tentatives
+        playable = [cid for cid in candidates if bundles.get(cid) and bundles[cid]['ranges']]
+        if not playable:
+            logger.info("[QUIZ] ⚠️ Aucun contexte jouable parmi %s", candidates)
+            return jsonify({
+                'error': 'no_more_questions',
+                'message': 'Toutes les questions disponibles ont été utilisées'
+            }), 404
+
+        # Tirage de tous les contextes en une fois, pondéré par le nombre de mains
+        # encore jamais posées : les contextes presque épuisés gaspillent moins de tentatives
+        total_hands = len(ALL_POKER_HANDS)
+        weights = [total_hands - len(excluded_by_context[cid]) for cid in playable]
+        draws = random.choices(playable, weights=weights, k=max_attempts)
+
+        for attempt, context_id in enumerate(draws):
+            logger.debug("[QUIZ] 🎲 Tentative %s: Contexte sélectionné = %s", attempt + 1, context_id)
+            question = generator.generate_question_from_bundle(
+                bundles[context_id], used_hands=excluded_by_context[context_id]
+            )
 
             if not question:
-                print(f"[QUIZ] ✗ Contexte {context_id} a échoué (question = None)")
+                logger.debug("[QUIZ] ✗ Contexte %s a échoué (question = None)", context_id)
                 continue
 
             # Vérifier si déjà posée
             key = (question['hand'], question['context_id'])
             if key not in excluded_set:
-                print(
-                    f"[QUIZ] ✅ Question générée: {question['hand']} (context {context_id}) après {attempt + 1} tentatives")
+                logger.debug("[QUIZ] ✅ Question générée: %s (context %s) après %s tentatives",
+                             question['hand'], context_id, attempt + 1)
                 return jsonify({
                     'success': True,
                     'question': question
                 })
 
         # Aucune question unique trouvée
-        print(f"[QUIZ] ⚠️ Plus de questions uniques disponibles après {max_attempts} tentatives")
+        logger.info("[QUIZ] ⚠️ Plus de questions uniques disponibles après %s tentatives", max_attempts)
         return jsonify({
             'error': 'no_more_questions',
             'message': 'Toutes les questions disponibles ont été utilisées'
         }), 404
 
     except Exception as e:
-        print(f"[QUIZ] ✗ Erreur: {e}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[QUIZ] ✗ Erreur: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1559,9 +2339,7 @@ def detect_conflicts():
         })
 
     except Exception as e:
-        print(f"[API] Erreur détection conflits: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[API] Erreur détection conflits: %s", e)
         return jsonify({
             'error': str(e)
         }), 500
@@ -1609,10 +2387,25 @@ def generate_quiz_with_variants():
 
         if not context_ids:
             return jsonify({'error': 'Aucun contexte sélectionné'}), 400
+
+        # IDs normalisés en entiers : ce sont les clés des bundles chargés
+        try:
+            context_ids = parse_context_ids(context_ids)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': f'ID de contexte invalide: {str(e)}'}), 400
         
         # 🎚️ Log du niveau d'agressivité
-        print(f"[QUIZ GEN] 🎚️ Agressivité de la table: {aggression.upper()}")
+        logger.debug("[QUIZ GEN] 🎚️ Agressivité de la table: %s", aggression.upper())
         
+        generator = QuizGenerator(aggression_level=aggression)  # 🎚️ Passer l'agressivité
+        bundles = generator.load_contexts(context_ids, conn=db())  # Une requête pour tout le quiz
+
+        # Contextes introuvables ou sans ranges : jamais tirés (aucune tentative gaspillée),
+        # vérifié avant de créer la session d'historique
+        playable = [cid for cid in context_ids if bundles.get(cid) and bundles[cid]['ranges']]
+        if not playable:
+            return jsonify({'error': 'Aucun contexte exploitable parmi la sélection'}), 400
+
         # 🆕 v4.5 - Créer session en BDD
         session_id = None
         if history_manager:
@@ -1622,91 +2415,84 @@ def generate_quiz_with_variants():
                     contexts_used=context_ids,
                     total_questions=question_count
                 )
-                print(f"[QUIZ GEN] 💾 Session créée en BDD: ID={session_id}")
+                logger.debug("[QUIZ GEN] 💾 Session créée en BDD: ID=%s", session_id)
             except Exception as e:
-                print(f"[QUIZ GEN] ⚠️ Erreur création session BDD: {e}")
+                logger.warning("[QUIZ GEN] ⚠️ Erreur création session BDD: %s", e)
                 # Continuer sans session BDD si erreur
 
-        generator = QuizGenerator(aggression_level=aggression)  # 🎚️ Passer l'agressivité
         questions = []
         total_subquestions = 0  # 🆕 Compteur de sous-questions
         used_hands_by_context = {}  # 🔧 v4.3.7 : Tracker les mains PAR CONTEXTE
+        total_used_hands = 0  # Nombre de mains dans le tracker, tous contextes confondus
         max_attempts = question_count * 10  # Éviter boucle infinie
         attempts = 0
+        draws = random.choices(playable, k=max_attempts)  # Tirage des contextes en une fois
+        # Variantes indexées par ID de contexte (les clés JSON sont des chaînes)
+        variant_by_context = {cid: variants.get(str(cid)) for cid in playable}
 
         # 🆕 Générer jusqu'à atteindre le nombre de sous-questions demandé
         while total_subquestions < question_count and attempts < max_attempts:
             attempts += 1
 
-            # Choisir un contexte aléatoire
-            context_id = random.choice(context_ids)
+            # Contexte aléatoire (pré-tiré)
+            context_id = draws[attempts - 1]
             
             # 🔧 v4.3.7 : Initialiser le set pour ce contexte si nécessaire
             if context_id not in used_hands_by_context:
                 used_hands_by_context[context_id] = set()
 
             # 🔧 BUGFIX v4.3.5 : Forcer les questions simples quand il reste peu de place
-            # Si on est proche de la limite, temporairement désactiver le drill_down
             # Les questions drill-down font généralement 2-3 étapes minimum
             remaining_slots = question_count - total_subquestions
-            force_simple = False
-            
-            if remaining_slots <= 2:
-                # Moins de 3 places : forcer question simple pour être sûr de remplir exactement
-                force_simple = True
-                original_can_drill = generator.drill_down_gen.can_generate_drill_down
-                generator.drill_down_gen.can_generate_drill_down = lambda ranges: False
-                print(f"[QUIZ GEN] 🎯 Reste {remaining_slots} place(s) → force question SIMPLE")
-            
-            # 🆕 v4.3.7 : Passer les mains déjà utilisées POUR CE CONTEXTE
-            question = generator.generate_question(context_id, used_hands=used_hands_by_context[context_id])
-            
-            # Restaurer la fonction d'origine si modifiée
+            force_simple = remaining_slots <= 2
             if force_simple:
-                generator.drill_down_gen.can_generate_drill_down = original_can_drill
+                logger.debug("[QUIZ GEN] 🎯 Reste %s place(s) → force question SIMPLE", remaining_slots)
+
+            # 🆕 v4.3.7 : Passer les mains déjà utilisées POUR CE CONTEXTE
+            # 📏 max_steps : un drill-down est tronqué aux places restantes,
+            # toute question générée tient donc dans le quiz (aucun rejet)
+            question = generator.generate_question_from_bundle(
+                bundles[context_id], used_hands=used_hands_by_context[context_id],
+                force_simple=force_simple, max_steps=remaining_slots
+            )
 
             if question:
+                qtype = question['type']
+                hand = question.get('hand')
+
                 # 🆕 v4.3.7 : Ajouter la main au tracker DU CONTEXTE
-                if 'hand' in question:
-                    used_hands_by_context[context_id].add(question['hand'])
-                    total_used = sum(len(hands) for hands in used_hands_by_context.values())
-                    print(f"[QUIZ GEN] 🎲 Main utilisée: {question['hand']} dans contexte {context_id} (total global: {total_used} mains)")
+                if hand is not None:
+                    context_hands = used_hands_by_context[context_id]
+                    if hand not in context_hands:
+                        context_hands.add(hand)
+                        total_used_hands += 1
+                    logger.debug("[QUIZ GEN] 🎲 Main utilisée: %s dans contexte %s (total global: %s mains)",
+                                 hand, context_id, total_used_hands)
                 
                 # 🆕 Calculer combien de sous-questions cette question ajoute
-                if question['type'] == 'drill_down':
-                    subq_count = len(question['levels'])
-                else:
-                    subq_count = 1
-
-                # 🆕 Vérifier si on peut ajouter cette question sans dépasser
-                if total_subquestions + subq_count <= question_count:
-                    # Ajouter la variante si elle existe
-                    variant = variants.get(str(context_id))
-                    if variant:
-                        question['variant'] = variant
-
-                    questions.append(question)
-                    total_subquestions += subq_count
-                    print(
-                        f"[QUIZ GEN] Question ajoutée ({question['type']}), sous-questions: {total_subquestions}/{question_count}")
-                else:
-                    # Pas assez de place pour cette question drill-down
-                    # Réessayer (normalement ne devrait plus arriver avec le fix)
-                    print(
-                        f"[QUIZ GEN] Question ignorée (trop longue), sous-questions actuelles: {total_subquestions}/{question_count}")
-                    continue
-
-        print(f"[QUIZ GEN] ✅ Quiz généré: {len(questions)} questions, {total_subquestions} sous-questions")
+                subq_count = len(question['levels']) if qtype == 'drill_down' else 1
 
-        return jsonify({
-            'questions': questions,
-            'session_id': session_id  # 🆕 v4.5 - ID de session pour historique
-        })
+                # Ajouter la variante si elle existe
+                variant = variant_by_context[context_id]
+                if variant:
+                    question['variant'] = variant
+
+                questions.append(question)
+                total_subquestions += subq_count
+                logger.debug("[QUIZ GEN] Question ajoutée (%s), sous-questions: %s/%s",
+                             qtype, total_subquestions, question_count)
+
+        logger.info("[QUIZ GEN] ✅ Quiz généré: %s questions, %s sous-questions", len(questions), total_subquestions)
+
+        # Questions sérialisées une à une (orjson) et envoyées au fil de l'eau
+        return stream_json_array(
+            questions,
+            prefix=b'{"questions":[',
+            suffix=b'],"session_id":' + _dumps_bytes(session_id) + b'}'  # 🆕 v4.5 - ID de session pour historique
+        )
 
     except Exception as e:
-        print(f"[API] Erreur génération quiz: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[API] Erreur génération quiz: %s", e)
         return jsonify({
             'error': str(e)
         }), 500
@@ -1751,9 +2537,7 @@ def submit_quiz_answer():
         return jsonify({'success': True})
     
     except Exception as e:
-        print(f"[API] Erreur sauvegarde réponse: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[API] Erreur sauvegarde réponse: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1794,9 +2578,7 @@ def get_quiz_session(session_id):
         return jsonify(results)
     
     except Exception as e:
-        print(f"[API] Erreur récupération session: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[API] Erreur récupération session: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1822,15 +2604,13 @@ def end_quiz_session(session_id):
         return jsonify(stats)
     
     except Exception as e:
-        print(f"[API] Erreur fin de session: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log_exception("[API] Erreur fin de session: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/test-quiz')
 def test_quiz():
-    return render_template('test-quiz.html')
+    return render_static_page('test-quiz.html')
 
 
 @app.route('/api/quiz/user-stats', methods=['GET'])
@@ -1856,7 +2636,7 @@ def get_user_stats():
         return jsonify(stats)
     
     except Exception as e:
-        print(f"[API] Erreur stats utilisateur: {str(e)}")
+        log_exception("[API] Erreur stats utilisateur: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1890,7 +2670,7 @@ def get_recent_sessions():
         return jsonify({'sessions': sessions})
     
     except Exception as e:
-        print(f"[API] Erreur sessions récentes: {str(e)}")
+        log_exception("[API] Erreur sessions récentes: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1907,10 +2687,10 @@ def get_quiz_progression():
         }
     """
     try:
-        print("[API] /api/quiz/progression appelée")
+        logger.debug("[API] /api/quiz/progression appelée")
         
         if not history_manager:
-            print("[API] ⚠️ history_manager non disponible")
+            logger.warning("[API] ⚠️ history_manager non disponible")
             return jsonify({
                 'sessions': [],
                 'overall_stats': {
@@ -1924,7 +2704,7 @@ def get_quiz_progression():
         # Récupérer toutes les sessions (limit=100 max)
         sessions_data = history_manager.get_recent_sessions(limit=100)
         
-        print(f"[API] {len(sessions_data)} session(s) récupérée(s)")
+        logger.debug("[API] %s session(s) récupérée(s)", len(sessions_data))
         
         if not sessions_data:
             return jsonify({
@@ -1977,7 +2757,7 @@ def get_quiz_progression():
             }
             
             formatted_sessions.append(formatted_session)
-            print(f"[API] Session {s['id']}: {formatted_session['score_percentage']}%")
+            logger.debug("[API] Session %s: %s%%", s['id'], formatted_session['score_percentage'])
         
         # Calculer les stats globales
         total_sessions = len(formatted_sessions)
@@ -2000,14 +2780,12 @@ def get_quiz_progression():
             }
         }
         
-        print(f"[API] ✅ {total_sessions} sessions, moyenne {average_score}%")
+        logger.debug("[API] ✅ %s sessions, moyenne %s%%", total_sessions, average_score)
         
         return jsonify(result)
         
     except Exception as e:
-        print(f'[ERROR] API progression: {e}')
-        import traceback
-        traceback.print_exc()
+        log_exception("[ERROR] API progression: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -2020,14 +2798,37 @@ def quiz_result():
     - BDD via session_id dans l'URL (?session_id=123)
     - sessionStorage en fallback (compatibilité)
     """
-    return render_template('quiz-result.html')
+    return render_static_page('quiz-result.html')
 
 @app.route('/history')
 def history():
     """Page d'historique des sessions de quiz"""
-    return render_template('history.html')
+    return render_static_page('history.html')
 if __name__ == '__main__':
-    print("\n🚀 Démarrage Flask...")
-    print("📍 http://localhost:5000\n")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Les handlers écrivent via une file : l'I/O de log ne bloque pas les requêtes
+    log_queue = queue.SimpleQueue()
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    log_listener = QueueListener(log_queue, log_handler)
+    logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+    # Serveur WSGI waitress (optionnel) hors développement : FLASK_ENV=dev force le serveur Flask
+    # Un seul process multi-thread : caches, verrou du pipeline et compteurs restent partagés
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+
+    if serve is not None and os.environ.get('FLASK_ENV') != 'dev':
+        print("\n🚀 Démarrage waitress (8 threads)...")
+        print("📍 http://localhost:5000\n")
+        serve(app, host='0.0.0.0', port=5000, threads=8)
+    else:
+        print("\n🚀 Démarrage Flask...")
+        print("📍 http://localhost:5000\n")
+        # Routes bloquées sur SQLite / sous-processus : un thread par requête pour
+        # qu'un import en cours ne fige pas le dashboard ni la validation
+        app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
 